@@ -0,0 +1,250 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import networkx as nx
+
+from src.generators import generate_grid_network, generate_manifest
+from src.network import read_binary_train_network, write_binary_train_network
+from src.ordering import PACKAGE_ORDERINGS
+from src.routing import (
+    NETWORK_BACKENDS,
+    construct_packages,
+    construct_train_network,
+    construct_trains,
+    order_packages,
+    plan_package_train,
+    search_shortest_path
+)
+from src.shortest_path import ShortestPathCache
+
+
+def generate_node_pairs(no_of_station, no_of_pair, seed=0):
+    rng = random.Random(seed)
+    pairs = dict()
+    # unordered pairs are kept unique so that every query misses the cache
+    while len(pairs) < no_of_pair:
+        left_node, right_node = rng.randrange(no_of_station), rng.randrange(no_of_station)
+        if left_node != right_node:
+            pairs[frozenset((left_node, right_node))] = (left_node, right_node)
+    return list(pairs.values())
+
+
+# the behaviour before the bidirectional search: two full searches per cache miss
+def two_pass_shortest_path(left_node, right_node, train_network):
+    time_cost = nx.dijkstra_path_length(train_network, left_node, right_node)
+    path = nx.dijkstra_path(train_network, left_node, right_node)
+    return time_cost, path
+
+
+# every query is a separate search, no cache is involved so that each pair costs
+# exactly one miss
+def benchmark_uncached_shortest_path(width=60, height=60, no_of_pair=200):
+    stations, routes = generate_grid_network(width, height)
+    graph, station_map = construct_train_network(stations, routes, backend='networkx')
+    train_network, _station_map = construct_train_network(stations, routes)
+    no_of_station = len(station_map)
+    pairs = generate_node_pairs(no_of_station, no_of_pair)
+
+    start = time.perf_counter()
+    for left_node, right_node in pairs:
+        two_pass_shortest_path(left_node, right_node, graph)
+    two_pass_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for left_node, right_node in pairs:
+        search_shortest_path(left_node, right_node, graph)
+    bidirectional_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for left_node, right_node in pairs:
+        search_shortest_path(left_node, right_node, train_network)
+    csr_bidirectional_time = time.perf_counter() - start
+
+    return {
+        'stations': no_of_station,
+        'pairs': no_of_pair,
+        'two_pass_seconds': two_pass_time,
+        'bidirectional_seconds': bidirectional_time,
+        'csr_bidirectional_seconds': csr_bidirectional_time,
+        'speedup': two_pass_time / bidirectional_time
+    }
+
+
+def measure_peak_memory(function, *arguments):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*arguments)
+    elapsed_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed_time, peak
+
+
+def benchmark_network_loading(width=200, height=200):
+    stations, routes = generate_grid_network(width, height)
+    with tempfile.TemporaryDirectory() as directory:
+        prefix = os.path.join(directory, 'network')
+        write_binary_train_network(prefix, stations, routes)
+        file_size = os.path.getsize(prefix + '.edges') + os.path.getsize(prefix + '.names')
+
+        _, graph_seconds, graph_peak = measure_peak_memory(
+            construct_train_network,
+            stations,
+            routes,
+            'networkx'
+        )
+        _, binary_seconds, binary_peak = measure_peak_memory(
+            read_binary_train_network,
+            prefix
+        )
+
+    return {
+        'stations': len(stations),
+        'routes': len(routes),
+        'file_bytes': file_size,
+        'networkx_seconds': graph_seconds,
+        'networkx_peak_bytes': graph_peak,
+        'binary_seconds': binary_seconds,
+        'binary_peak_bytes': binary_peak
+    }
+
+
+def benchmark_package_ordering(width=30, height=30, no_of_package=300, no_of_train=12):
+    stations, routes = generate_grid_network(width, height)
+    train_network, station_map = construct_train_network(stations, routes)
+    deliveries, trains = generate_manifest(stations, no_of_package, no_of_train)
+
+    results = dict()
+    for ordering in PACKAGE_ORDERINGS:
+        # the ordering alone
+        start = time.perf_counter()
+        order_packages(
+            ordering,
+            construct_packages(deliveries, station_map)[0],
+            construct_trains(trains, station_map),
+            train_network
+        )
+        ordering_time = time.perf_counter() - start
+
+        shortest_paths = ShortestPathCache(len(station_map))
+        start = time.perf_counter()
+        logs = plan_package_train(
+            list(deliveries),
+            list(trains),
+            train_network,
+            station_map,
+            shortest_paths,
+            ordering=ordering
+        )
+        results[ordering] = {
+            'ordering_seconds': ordering_time,
+            'seconds': time.perf_counter() - start,
+            'cache_hit_rate': shortest_paths.statistics()['hit_rate'],
+            'makespan': max(log['time'] for log in logs)
+        }
+    return results
+
+
+def benchmark_planners(width=30, height=30, no_of_package=300, no_of_train=12):
+    stations, routes = generate_grid_network(width, height)
+    train_network, station_map = construct_train_network(stations, routes)
+    deliveries, trains = generate_manifest(stations, no_of_package, no_of_train)
+
+    results = dict()
+    configurations = [
+        ('greedy', {'planner': 'greedy'}),
+        ('greedy_relay', {'planner': 'greedy', 'relay': True}),
+        ('insertion', {'planner': 'insertion'})
+    ]
+    for name, options in configurations:
+        shortest_paths = ShortestPathCache(len(station_map))
+        start = time.perf_counter()
+        logs = plan_package_train(
+            list(deliveries),
+            list(trains),
+            train_network,
+            station_map,
+            shortest_paths,
+            **options
+        )
+        results[name] = {
+            'seconds': time.perf_counter() - start,
+            'makespan': max(log['time'] for log in logs),
+            'travel_time': sum(log['next_journey_duration'] or 0 for log in logs)
+        }
+    return results
+
+
+def measure_process_seconds(arguments, repeat):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = list()
+    for _i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=root, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+# the import saved by the csr backend only pays off if it plans large runs no
+# slower than networkx, so both are timed on the same manifest
+def measure_backend_planning_seconds(width=30, height=30, no_of_package=300, no_of_train=12):
+    stations, routes = generate_grid_network(width, height)
+    deliveries, trains = generate_manifest(stations, no_of_package, no_of_train)
+    results = dict()
+    for backend in NETWORK_BACKENDS:
+        train_network, station_map = construct_train_network(stations, routes, backend)
+        start = time.perf_counter()
+        plan_package_train(
+            list(deliveries),
+            list(trains),
+            train_network,
+            station_map,
+            ShortestPathCache(len(station_map))
+        )
+        results['{}_plan_seconds'.format(backend)] = time.perf_counter() - start
+    return results
+
+
+# every small plan run from cron pays the interpreter start and the imports, so
+# these are timed in fresh processes
+def benchmark_startup_time(repeat=10):
+    stations, routes = generate_grid_network(5, 5)
+    deliveries, trains = generate_manifest(stations, 10, 2)
+    results = measure_backend_planning_seconds()
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, 'plan.json')
+        with open(input_path, 'w') as input_file:
+            json.dump({
+                'stations': stations,
+                'routes': routes,
+                'deliveries': deliveries,
+                'trains': trains
+            }, input_file)
+
+        results.update({
+            'interpreter_seconds': measure_process_seconds(['-c', 'pass'], repeat),
+            'import_routing_seconds': measure_process_seconds(['-c', 'import src.routing'], repeat),
+            'import_networkx_seconds': measure_process_seconds(['-c', 'import networkx'], repeat),
+            'cli_plan_seconds': measure_process_seconds(['-m', 'src.cli', input_path], repeat),
+            'cli_networkx_plan_seconds': measure_process_seconds(
+                ['-m', 'src.cli', input_path, '--backend', 'networkx'],
+                repeat
+            )
+        })
+    return results
+
+
+if __name__ == '__main__':
+    print(benchmark_uncached_shortest_path())
+    print(benchmark_network_loading())
+    for ordering, result in benchmark_package_ordering().items():
+        print(ordering, result)
+    for name, result in benchmark_planners().items():
+        print(name, result)
+    print(benchmark_startup_time())
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import pickle
+import zlib
+
+CHECKPOINT_VERSION = 1
+# a checkpoint is written at most once per interval so the cost of pickling
+# the planning state stays a small fraction of the run
+DEFAULT_CHECKPOINT_INTERVAL = 60
+
+
+# network_arrays are buffers describing the network, options the planning options
+# that change the state a checkpoint holds
+def fingerprint_input(deliveries, trains, network_arrays, options):
+    digest = hashlib.sha1()
+    digest.update(repr((options, deliveries, trains)).encode('utf-8'))
+    for array in network_arrays:
+        digest.update(array)
+    return digest.hexdigest()
+
+
+def save_checkpoint(path, state):
+    payload = zlib.compress(
+        pickle.dumps(
+            {'version': CHECKPOINT_VERSION, 'state': state},
+            protocol=pickle.HIGHEST_PROTOCOL
+        ),
+        1
+    )
+    # write to a temporary file first so a killed process never leaves a
+    # truncated checkpoint behind
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as checkpoint_file:
+        checkpoint_file.write(payload)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path, fingerprint):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as checkpoint_file:
+        try:
+            checkpoint = pickle.loads(zlib.decompress(checkpoint_file.read()))
+        except (zlib.error, pickle.UnpicklingError, EOFError) as _e:
+            raise ValueError('INVALID_CHECKPOINT_FILE')
+    if checkpoint.get('version', None) != CHECKPOINT_VERSION:
+        raise ValueError('INVALID_CHECKPOINT_FILE')
+    if checkpoint['state']['fingerprint'] != fingerprint:
+        raise ValueError('CHECKPOINT_DOES_NOT_MATCH_INPUT')
+    return checkpoint['state']
@@ -0,0 +1,130 @@
+import argparse
+import json
+import sys
+
+from src.checkpoint import DEFAULT_CHECKPOINT_INTERVAL
+from src.ordering import PACKAGE_ORDERINGS
+from src.relay import DEFAULT_MAX_TRANSFERS
+from src.routing import (
+    DEFAULT_BATCH_SIZE,
+    NETWORK_BACKENDS,
+    PLANNERS,
+    construct_train_network,
+    load_binary_train_network,
+    plan_package_train,
+    validate_input
+)
+from src.shortest_path import ShortestPathCache
+from src.trace import DecisionTrace, export_chrome_trace
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description='Plan mail train deliveries and print the chronological train schedule'
+    )
+    parser.add_argument(
+        'input',
+        help='JSON file with "deliveries" and "trains", and "stations" and "routes" '
+        'unless --binary-network is given'
+    )
+    parser.add_argument('--binary-network', metavar='PREFIX',
+                        help='read the network from <PREFIX>.edges and <PREFIX>.names')
+    parser.add_argument('--backend', choices=NETWORK_BACKENDS, default='csr')
+    parser.add_argument('--ordering', choices=PACKAGE_ORDERINGS, default='manifest')
+    parser.add_argument('--planner', choices=PLANNERS, default='greedy')
+    parser.add_argument('--relay', action='store_true')
+    parser.add_argument('--max-transfers', type=int, default=DEFAULT_MAX_TRANSFERS)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--checkpoint', metavar='PATH')
+    parser.add_argument('--checkpoint-interval', type=float, default=DEFAULT_CHECKPOINT_INTERVAL)
+    parser.add_argument('--checkpoint-cache', action='store_true')
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--trace', metavar='PATH', help='write every decision to a binary trace file')
+    parser.add_argument('--chrome-trace', metavar='PATH',
+                        help='write the schedule and decisions as a Chrome trace')
+    parser.add_argument('--output', metavar='PATH', default='-',
+                        help='file the schedule is written to as JSON lines, stdout by default')
+    return parser
+
+
+def load_network(arguments, manifest):
+    if not isinstance(manifest, dict):
+        raise ValueError('INPUT_MUST_BE_AN_OBJECT')
+    deliveries = manifest.get('deliveries', None)
+    trains = manifest.get('trains', None)
+    if arguments.binary_network is not None:
+        return load_binary_train_network(arguments.binary_network, deliveries, trains)
+
+    stations = manifest.get('stations', None)
+    routes = manifest.get('routes', None)
+    validate_input(stations, routes, deliveries, trains)
+    return construct_train_network(stations, routes, arguments.backend)
+
+
+def write_schedule(output, logs):
+    for log in logs:
+        output.write(json.dumps(log) + '\n')
+
+
+def report_error(error):
+    print('error: {}'.format(error), file=sys.stderr)
+    return 1
+
+
+def main(argv=None):
+    arguments = build_parser().parse_args(argv)
+    trace = None
+    try:
+        if arguments.trace is not None or arguments.chrome_trace is not None:
+            trace = DecisionTrace(path=arguments.trace)
+        with open(arguments.input) as input_file:
+            manifest = json.load(input_file)
+        train_network, station_map = load_network(arguments, manifest)
+        logs = plan_package_train(
+            manifest['deliveries'],
+            manifest['trains'],
+            train_network,
+            station_map,
+            ShortestPathCache(len(station_map)),
+            ordering=arguments.ordering,
+            planner=arguments.planner,
+            relay=arguments.relay,
+            max_transfers=arguments.max_transfers,
+            processes=arguments.processes,
+            batch_size=arguments.batch_size,
+            trace=trace,
+            checkpoint_path=arguments.checkpoint,
+            checkpoint_interval=arguments.checkpoint_interval,
+            checkpoint_cache=arguments.checkpoint_cache,
+            resume=arguments.resume
+        )
+
+        if arguments.chrome_trace is not None:
+            export_chrome_trace(arguments.chrome_trace, logs, trace.decisions())
+        if arguments.output == '-':
+            write_schedule(sys.stdout, logs)
+        else:
+            with open(arguments.output, 'w') as output_file:
+                write_schedule(output_file, logs)
+    except json.JSONDecodeError as _e:
+        return report_error('INVALID_JSON')
+    except TypeError as _e:
+        # e.g. a delivery that is not a list or a weight that is not a number
+        return report_error('MALFORMED_INPUT')
+    except ValueError as e:
+        return report_error(e)
+    except FileNotFoundError as e:
+        return report_error('FILE_NOT_FOUND {}'.format(e.filename))
+    except OSError as e:
+        # e.g. a trace or output path that cannot be written
+        return report_error('CANNOT_ACCESS_FILE {}'.format(e.filename))
+    finally:
+        if trace is not None:
+            trace.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import pytest
+
+
+# the fixture returns a builder since routing converts the lists in place
+@pytest.fixture
+def hitchhike_scenario():
+    def build():
+        stations = ['A', 'B', 'C', 'D']
+        routes = [
+            ('E1', 'A', 'B', 5),
+            ('E2', 'A', 'C', 1),
+            ('E3', 'A', 'D', 2)
+        ]
+        deliveries = [
+            ('P1', 'D', 'B', 1),
+            ('P2', 'D', 'C', 2),
+            ('P3', 'B', 'C', 6)
+        ]
+        trains = [
+            ('Q1', 'D', 3),
+            ('Q2', 'C', 6)
+        ]
+        return stations, routes, deliveries, trains
+    return build
@@ -0,0 +1,38 @@
+import random
+
+
+# synthetic networks for the benchmark and the tests
+def generate_grid_network(width, height, seed=0):
+    rng = random.Random(seed)
+    stations = ['S{}_{}'.format(x, y) for y in range(height) for x in range(width)]
+    routes = list()
+    for y in range(height):
+        for x in range(width):
+            if x + 1 < width:
+                routes.append((
+                    'E{}'.format(len(routes)),
+                    'S{}_{}'.format(x, y),
+                    'S{}_{}'.format(x + 1, y),
+                    rng.randint(1, 10)
+                ))
+            if y + 1 < height:
+                routes.append((
+                    'E{}'.format(len(routes)),
+                    'S{}_{}'.format(x, y),
+                    'S{}_{}'.format(x, y + 1),
+                    rng.randint(1, 10)
+                ))
+    return stations, routes
+
+
+def generate_manifest(stations, no_of_package, no_of_train, seed=0):
+    rng = random.Random(seed)
+    deliveries = list()
+    for index in range(no_of_package):
+        origin, destination = rng.sample(stations, 2)
+        deliveries.append(('P{}'.format(index), origin, destination, rng.randint(1, 10)))
+    trains = [
+        ('Q{}'.format(index), rng.choice(stations), rng.randint(10, 30))
+        for index in range(no_of_train)
+    ]
+    return deliveries, trains
@@ -0,0 +1,341 @@
+import heapq
+import numpy as np
+
+# a binary network is stored as two files sharing a prefix:
+# <prefix>.edges holds a header followed by the int32 left station, right station and
+# time cost arrays of every route, a route is identified by its position
+# <prefix>.names holds a string table of every station name followed by every
+# route name, stored as int64 offsets into a utf-8 blob
+EDGE_FILE_SUFFIX = '.edges'
+NAME_FILE_SUFFIX = '.names'
+EDGE_FILE_MAGIC = b'MTRE'
+NAME_FILE_MAGIC = b'MTRN'
+FILE_VERSION = 1
+
+EDGE_HEADER = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<i4'),
+    ('no_of_station', '<i4'),
+    ('no_of_route', '<i4')
+])
+NAME_HEADER = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<i4'),
+    ('no_of_name', '<i8')
+])
+
+
+# every station is labelled with a representative station of its connected component
+# by repeatedly hooking the root of the higher label onto the lower label of each
+# route and then pointer jumping until every station points at its root
+def label_components(no_of_station, left, right):
+    labels = np.arange(no_of_station, dtype=np.int64)
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    while True:
+        left_labels = labels[left]
+        right_labels = labels[right]
+        lower = np.minimum(left_labels, right_labels)
+        higher = np.maximum(left_labels, right_labels)
+        changed = lower != higher
+        if not changed.any():
+            return labels
+        np.minimum.at(labels, higher[changed], lower[changed])
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def csr_shortest_path_tree(offsets, targets, time_costs, source):
+    distances = [None] * (len(offsets) - 1)
+    predecessors = [None] * (len(offsets) - 1)
+    seen = {source: 0}
+    fringe = [(0, source)]
+    while fringe:
+        cost, station = heapq.heappop(fringe)
+        if distances[station] is not None:
+            continue
+        distances[station] = cost
+        start = offsets[station]
+        end = offsets[station + 1]
+        for neighbour, time_cost in zip(
+            targets[start:end].tolist(),
+            time_costs[start:end].tolist()
+        ):
+            neighbour_cost = cost + time_cost
+            if distances[neighbour] is not None:
+                continue
+            if neighbour not in seen or neighbour_cost < seen[neighbour]:
+                seen[neighbour] = neighbour_cost
+                predecessors[neighbour] = station
+                heapq.heappush(fringe, (neighbour_cost, neighbour))
+    return distances, predecessors
+
+
+class StringTable:
+
+    # names are decoded only when they are looked up
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        start = int(self._offsets[index])
+        end = int(self._offsets[index + 1])
+        return bytes(self._blob[start:end]).decode('utf-8')
+
+    def buffers(self):
+        return [np.ascontiguousarray(self._offsets), np.ascontiguousarray(self._blob)]
+
+    def slice(self, start, stop):
+        offsets = self._offsets[start:stop + 1].tolist()
+        blob = bytes(self._blob[offsets[0]:offsets[-1]])
+        base = offsets[0]
+        return [
+            blob[offsets[i] - base:offsets[i + 1] - base].decode('utf-8')
+            for i in range(len(offsets) - 1)
+        ]
+
+
+class TrainNetwork:
+
+    # the routes are kept as a compressed sparse row adjacency over numpy arrays,
+    # every route appears once from each of its two stations
+    def __init__(self, no_of_station, left, right, time_cost, names):
+        self._no_of_station = no_of_station
+        self._no_of_route = len(left)
+        self._names = names
+
+        sources = np.concatenate((left, right))
+        order = np.argsort(sources, kind='stable')
+        self._targets = np.concatenate((right, left))[order].astype(np.int32)
+        self._time_costs = np.concatenate((time_cost, time_cost))[order].astype(np.int32)
+        self._routes = (order % max(self._no_of_route, 1)).astype(np.int32)
+        self._offsets = np.zeros(no_of_station + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources, minlength=no_of_station),
+            out=self._offsets[1:]
+        )
+        self._components = label_components(no_of_station, left, right)
+        self._route_positions = dict()
+
+    @classmethod
+    def from_routes(cls, stations, routes):
+        station_map = {name: position for position, name in enumerate(stations)}
+        left = np.fromiter((station_map[route[1]] for route in routes), np.int32, len(routes))
+        right = np.fromiter((station_map[route[2]] for route in routes), np.int32, len(routes))
+        time_cost = np.fromiter((route[3] for route in routes), np.int32, len(routes))
+        names = list(stations) + [route[0] for route in routes]
+        return cls(len(stations), left, right, time_cost, names), station_map
+
+    def no_of_station(self):
+        return self._no_of_station
+
+    def no_of_route(self):
+        return self._no_of_route
+
+    def csr(self):
+        return self._offsets, self._targets, self._time_costs
+
+    # the adjacency arrays and the names, enough to tell two networks apart
+    def arrays(self):
+        if isinstance(self._names, StringTable):
+            names = self._names.buffers()
+        else:
+            names = [repr(self._names).encode('utf-8')]
+        return [self._offsets, self._targets, self._time_costs, self._routes] + names
+
+    def components(self):
+        return self._components
+
+    def station_map(self):
+        if isinstance(self._names, StringTable):
+            station_names = self._names.slice(0, self._no_of_station)
+        else:
+            station_names = self._names[:self._no_of_station]
+        return {name: position for position, name in enumerate(station_names)}
+
+    def station_name(self, station):
+        return self._names[station]
+
+    def neighbours(self, station):
+        start = self._offsets[station]
+        end = self._offsets[station + 1]
+        return zip(
+            self._targets[start:end].tolist(),
+            self._time_costs[start:end].tolist()
+        )
+
+    # with parallel routes between two stations the cheapest one is used, the
+    # position found for a pair of stations is kept as the same legs are looked up
+    # again and again while planning
+    def _route_position(self, left_node, right_node):
+        position = self._route_positions.get((left_node, right_node), None)
+        if position is not None:
+            return position
+
+        start = int(self._offsets[left_node])
+        end = int(self._offsets[left_node + 1])
+        best_cost = None
+        targets = self._targets[start:end].tolist()
+        time_costs = self._time_costs[start:end].tolist()
+        for index, (target, time_cost) in enumerate(zip(targets, time_costs)):
+            if target == right_node and (best_cost is None or time_cost < best_cost):
+                position = start + index
+                best_cost = time_cost
+        if position is None:
+            raise ValueError('NO_ROUTE_BETWEEN_STATIONS')
+        self._route_positions[(left_node, right_node)] = position
+        return position
+
+    def route_time_cost(self, left_node, right_node):
+        return int(self._time_costs[self._route_position(left_node, right_node)])
+
+    def route_name(self, left_node, right_node):
+        route = self._routes[self._route_position(left_node, right_node)]
+        return self._names[self._no_of_station + int(route)]
+
+    # single source dijkstra over every reachable station, unreachable stations keep
+    # a distance and predecessor of None
+    def shortest_path_tree(self, source):
+        return csr_shortest_path_tree(
+            self._offsets,
+            self._targets,
+            self._time_costs,
+            source
+        )
+
+    # bidirectional dijkstra, the search stops once the two frontiers meet
+    # returns None, None when the stations are not connected
+    def shortest_path(self, source, target):
+        if source == target:
+            return 0, [source]
+
+        distances = [dict(), dict()]
+        seen = [{source: 0}, {target: 0}]
+        predecessors = [{source: None}, {target: None}]
+        fringes = [[(0, source)], [(0, target)]]
+        best_cost = None
+        meeting_station = None
+
+        direction = 1
+        while fringes[0] and fringes[1]:
+            direction = 1 - direction
+            cost, station = heapq.heappop(fringes[direction])
+            if station in distances[direction]:
+                continue
+            distances[direction][station] = cost
+            if station in distances[1 - direction]:
+                break
+
+            for neighbour, time_cost in self.neighbours(station):
+                neighbour_cost = cost + time_cost
+                if neighbour in distances[direction]:
+                    continue
+                if neighbour not in seen[direction] or neighbour_cost < seen[direction][neighbour]:
+                    seen[direction][neighbour] = neighbour_cost
+                    predecessors[direction][neighbour] = station
+                    heapq.heappush(fringes[direction], (neighbour_cost, neighbour))
+                    if neighbour in seen[1 - direction]:
+                        total_cost = neighbour_cost + seen[1 - direction][neighbour]
+                        if best_cost is None or total_cost < best_cost:
+                            best_cost = total_cost
+                            meeting_station = neighbour
+
+        if best_cost is None:
+            return None, None
+
+        path = list()
+        station = meeting_station
+        while station is not None:
+            path.append(station)
+            station = predecessors[0][station]
+        path.reverse()
+        station = predecessors[1][meeting_station]
+        while station is not None:
+            path.append(station)
+            station = predecessors[1][station]
+        return best_cost, path
+
+
+def write_binary_train_network(prefix, stations, routes):
+    station_map = {name: position for position, name in enumerate(stations)}
+    header = np.zeros(1, dtype=EDGE_HEADER)
+    header[0] = (EDGE_FILE_MAGIC, FILE_VERSION, len(stations), len(routes))
+    with open(prefix + EDGE_FILE_SUFFIX, 'wb') as edge_file:
+        edge_file.write(header.tobytes())
+        for column in range(1, 4):
+            if column == 3:
+                values = (route[3] for route in routes)
+            else:
+                values = (station_map[route[column]] for route in routes)
+            edge_file.write(np.fromiter(values, '<i4', len(routes)).tobytes())
+
+    encoded_names = [str(name).encode('utf-8') for name in stations]
+    encoded_names.extend(str(route[0]).encode('utf-8') for route in routes)
+    offsets = np.zeros(len(encoded_names) + 1, dtype='<i8')
+    np.cumsum([len(name) for name in encoded_names], out=offsets[1:])
+    header = np.zeros(1, dtype=NAME_HEADER)
+    header[0] = (NAME_FILE_MAGIC, FILE_VERSION, len(encoded_names))
+    with open(prefix + NAME_FILE_SUFFIX, 'wb') as name_file:
+        name_file.write(header.tobytes())
+        name_file.write(offsets.tobytes())
+        for name in encoded_names:
+            name_file.write(name)
+
+
+def read_binary_train_network(prefix):
+    edges = np.memmap(prefix + EDGE_FILE_SUFFIX, dtype=np.uint8, mode='r')
+    if len(edges) < EDGE_HEADER.itemsize:
+        raise ValueError('INVALID_NETWORK_FILE')
+    header = edges[:EDGE_HEADER.itemsize].view(EDGE_HEADER)[0]
+    if header['magic'] != EDGE_FILE_MAGIC or header['version'] != FILE_VERSION:
+        raise ValueError('INVALID_NETWORK_FILE')
+    no_of_station = int(header['no_of_station'])
+    no_of_route = int(header['no_of_route'])
+    if len(edges) != EDGE_HEADER.itemsize + 3 * 4 * no_of_route:
+        raise ValueError('INVALID_NETWORK_FILE')
+    columns = edges[EDGE_HEADER.itemsize:].view('<i4').reshape(3, no_of_route)
+    left, right, time_cost = columns[0], columns[1], columns[2]
+
+    names = np.memmap(prefix + NAME_FILE_SUFFIX, dtype=np.uint8, mode='r')
+    if len(names) < NAME_HEADER.itemsize:
+        raise ValueError('INVALID_NETWORK_FILE')
+    header = names[:NAME_HEADER.itemsize].view(NAME_HEADER)[0]
+    if header['magic'] != NAME_FILE_MAGIC or header['version'] != FILE_VERSION:
+        raise ValueError('INVALID_NETWORK_FILE')
+    no_of_name = int(header['no_of_name'])
+    if no_of_name != no_of_station + no_of_route:
+        raise ValueError('INVALID_NETWORK_FILE')
+    blob_start = NAME_HEADER.itemsize + 8 * (no_of_name + 1)
+    if len(names) < blob_start:
+        raise ValueError('INVALID_NETWORK_FILE')
+    offsets = names[NAME_HEADER.itemsize:blob_start].view('<i8')
+    blob = names[blob_start:]
+    # every name must lie within the blob and follow the previous one
+    if offsets[0] != 0 or offsets[-1] != len(blob) or not np.all(np.diff(offsets) >= 0):
+        raise ValueError('INVALID_NETWORK_FILE')
+    string_table = StringTable(offsets, blob)
+
+    if no_of_station == 0:
+        raise ValueError('NO_STATION_DEFINED')
+    if no_of_route == 0:
+        raise ValueError('NO_ROUTE_DEFINED_BETWEEN_STATION')
+    if left.min() < 0 or right.min() < 0 or \
+            left.max() >= no_of_station or right.max() >= no_of_station:
+        raise ValueError('MISSING_STATION_IN_STATIONS')
+    if np.any(left == right):
+        raise ValueError('INVALID_ROUTE_CONNECTING_A_STATION_TO_ITSELF')
+    if time_cost.min() <= 0:
+        raise ValueError('ROUTE_TIME_COST_MUST_BE_BIGGER_THAN_ZERO')
+
+    train_network = TrainNetwork(no_of_station, left, right, time_cost, string_table)
+    station_map = train_network.station_map()
+    if len(station_map) != no_of_station:
+        raise ValueError('DUPLICATED_STATION_NAME')
+    return train_network, station_map
@@ -0,0 +1,88 @@
+import math
+
+PACKAGE_ORDERINGS = (
+    'manifest',
+    'origin',
+    'nearest_train',
+    'weight',
+    'space_filling'
+)
+
+
+# packages in manifest order
+def order_by_manifest(package_collections):
+    return list(range(len(package_collections)))
+
+
+# packages sharing a component and an origin station are planned one after another
+def order_by_origin(package_collections, components):
+    return sorted(
+        range(len(package_collections)),
+        key=lambda index: (
+            int(components[package_collections[index].origin()]),
+            package_collections[index].origin()
+        )
+    )
+
+
+# packages closest to a train that can carry them are planned first
+def order_by_nearest_train(package_collections, train_collections, components, distance):
+    nearest_distances = list()
+    for package in package_collections:
+        nearest_distance = math.inf
+        for train in train_collections:
+            if train.max_capacity() < package.weight():
+                continue
+            if components[train.locate()] != components[package.origin()]:
+                continue
+            nearest_distance = min(
+                nearest_distance,
+                distance(train.locate(), package.origin())
+            )
+        nearest_distances.append(nearest_distance)
+    return sorted(
+        range(len(package_collections)),
+        key=lambda index: nearest_distances[index]
+    )
+
+
+# heaviest packages are planned first while the trains still have spare capacity
+def order_by_weight(package_collections):
+    return sorted(
+        range(len(package_collections)),
+        key=lambda index: -package_collections[index].weight()
+    )
+
+
+# a depth first walk over the network that follows the cheapest route first ranks
+# the stations so that consecutive ranks are mostly adjacent stations, packages are
+# then planned in the rank of their origin
+def rank_stations(no_of_station, neighbours):
+    ranks = [None] * no_of_station
+    rank = 0
+    for root in range(no_of_station):
+        if ranks[root] is not None:
+            continue
+        stack = [root]
+        while stack:
+            station = stack.pop()
+            if ranks[station] is not None:
+                continue
+            ranks[station] = rank
+            rank += 1
+            unvisited = sorted(
+                (time_cost, neighbour)
+                for neighbour, time_cost in neighbours(station)
+                if ranks[neighbour] is None
+            )
+            # the cheapest route is pushed last so that it is walked first
+            stack.extend(neighbour for _time_cost, neighbour in reversed(unvisited))
+    return ranks
+
+
+def order_by_space_filling(package_collections, no_of_station, neighbours):
+    ranks = rank_stations(no_of_station, neighbours)
+    return sorted(
+        range(len(package_collections)),
+        key=lambda index: ranks[package_collections[index].origin()]
+    )
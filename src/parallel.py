@@ -0,0 +1,131 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from src.network import TrainNetwork, csr_shortest_path_tree
+
+UNREACHABLE = -1
+
+# views of the shared network and index attached by each worker process
+_worker_state = dict()
+
+
+class SharedArray:
+
+    # a numpy array in a named shared memory block, only the name, shape and dtype
+    # are sent to the workers which attach to the same memory
+    def __init__(self, shape, dtype, name=None):
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype)
+        size = max(int(np.prod(self._shape)) * self._dtype.itemsize, 1)
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self._array = np.ndarray(self._shape, dtype=self._dtype, buffer=self._memory.buf)
+
+    @classmethod
+    def copy_of(cls, array):
+        shared_array = cls(array.shape, array.dtype)
+        shared_array.array()[...] = array
+        return shared_array
+
+    def array(self):
+        return self._array
+
+    def descriptor(self):
+        return self._shape, self._dtype.str, self._memory.name
+
+    def close(self):
+        self._array = None
+        self._memory.close()
+
+    def unlink(self):
+        self.close()
+        self._memory.unlink()
+
+
+def build_csr(train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.csr()
+    # a networkx graph is turned into the same adjacency arrays
+    left, right, time_cost = zip(*train_network.edges(data='weight'))
+    network = TrainNetwork(
+        train_network.number_of_nodes(),
+        np.asarray(left, dtype=np.int32),
+        np.asarray(right, dtype=np.int32),
+        np.asarray(time_cost, dtype=np.int32),
+        list()
+    )
+    return network.csr()
+
+
+def attach_worker(network_descriptors, index_descriptors):
+    _worker_state['network'] = [SharedArray(*descriptor) for descriptor in network_descriptors]
+    _worker_state['index'] = [SharedArray(*descriptor) for descriptor in index_descriptors]
+
+
+def compute_tree_in_worker(row, source):
+    offsets, targets, time_costs = [shared.array() for shared in _worker_state['network']]
+    distances, predecessors = [shared.array() for shared in _worker_state['index']]
+    tree_distances, tree_predecessors = csr_shortest_path_tree(
+        offsets,
+        targets,
+        time_costs,
+        source
+    )
+    distances[row] = [UNREACHABLE if cost is None else cost for cost in tree_distances]
+    predecessors[row] = [
+        UNREACHABLE if station is None else station for station in tree_predecessors
+    ]
+    return row
+
+
+class SharedShortestPathIndex:
+
+    # a pool of worker processes computing full shortest path trees for batches of
+    # sources, the network and the resulting index live in shared memory so that
+    # no worker ever copies them
+    # the distance and predecessor rows take batch size times the number of
+    # stations times 12 bytes of shared memory
+    def __init__(self, train_network, processes, batch_size):
+        if batch_size < 1:
+            raise ValueError('BATCH_SIZE_MUST_BE_BIGGER_THAN_ZERO')
+        self._batch_size = batch_size
+        self._network = [SharedArray.copy_of(array) for array in build_csr(train_network)]
+        self._no_of_station = len(self._network[0].array()) - 1
+        self._distances = SharedArray((batch_size, self._no_of_station), np.int64)
+        self._predecessors = SharedArray((batch_size, self._no_of_station), np.int32)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=attach_worker,
+            initargs=(
+                [shared.descriptor() for shared in self._network],
+                [self._distances.descriptor(), self._predecessors.descriptor()]
+            )
+        )
+
+    def batch_size(self):
+        return self._batch_size
+
+    # computes the trees of up to batch_size sources in the pool and stores them
+    # in the shortest path cache
+    def compute(self, sources, shortest_paths):
+        sources = list(sources)[:self._batch_size]
+        list(self._executor.map(compute_tree_in_worker, range(len(sources)), sources))
+
+        distances = self._distances.array()
+        predecessors = self._predecessors.array()
+        for row, source in enumerate(sources):
+            tree_distances = distances[row].astype(object)
+            tree_distances[distances[row] == UNREACHABLE] = None
+            tree_predecessors = predecessors[row].astype(object)
+            tree_predecessors[predecessors[row] == UNREACHABLE] = None
+            shortest_paths.set_tree(source, tree_distances.tolist(), tree_predecessors.tolist())
+
+    def close(self):
+        self._executor.shutdown()
+        for shared in self._network:
+            shared.unlink()
+        self._distances.unlink()
+        self._predecessors.unlink()
@@ -0,0 +1,136 @@
+from bisect import bisect_left, insort
+
+DEFAULT_MAX_TRANSFERS = 3
+
+
+class Timetable:
+
+    # the time expanded network of the planned train movements: every leg a train
+    # travels between two stations is a (station, time) to (station, time) edge, and
+    # a package can wait at a station for any later departure
+    def __init__(self):
+        self._legs = dict()
+        self._departures = dict()
+
+    def legs(self, train):
+        return self._legs.get(train, list())
+
+    # log_index is the position in the train log of the entry made when the train
+    # departs on this leg, load is the weight carried on the leg
+    def add_leg(
+        self,
+        train,
+        depart_station,
+        depart_time,
+        arrive_station,
+        arrive_time,
+        load,
+        log_index
+    ):
+        legs = self._legs.setdefault(train, list())
+        legs.append({
+            'depart_station': depart_station,
+            'depart_time': depart_time,
+            'arrive_station': arrive_station,
+            'arrive_time': arrive_time,
+            'load': load,
+            'log_index': log_index
+        })
+        insort(
+            self._departures.setdefault(depart_station, list()),
+            (depart_time, id(train), len(legs) - 1, train)
+        )
+
+    # round based search (as in RAPTOR) for the earliest arrival at destination of a
+    # package ready at origin at ready_time, riding legs with spare capacity for
+    # weight and changing train at most max_transfers times
+    # round k only boards from the arrivals of earlier rounds, so every station keeps
+    # one label per number of rides and a later arrival with fewer rides is never
+    # shadowed by an earlier one that used up the transfers
+    # returns the arrival time and the rides as (train, first leg, last leg), or
+    # None, None when no chain of legs reaches the destination
+    def earliest_arrival(
+        self,
+        origin,
+        destination,
+        ready_time,
+        weight,
+        max_transfers=DEFAULT_MAX_TRANSFERS,
+        deadline=None
+    ):
+        if origin == destination:
+            return ready_time, list()
+
+        # the best arrival at each station over all rounds so far and the round it
+        # was made in, labels[k] holds the stations improved in round k
+        arrivals = {origin: (ready_time, 0)}
+        labels = [{origin: (ready_time, None, None, None, None, None)}]
+        best_arrival = deadline
+        marked = [origin]
+        for no_of_ride in range(1, max_transfers + 2):
+            improved = dict()
+            for station in marked:
+                arrival_time, arrival_round = arrivals[station]
+                boarded = set()
+                departures = self._departures.get(station, list())
+                start = bisect_left(departures, (arrival_time,))
+                for index in range(start, len(departures)):
+                    depart_time, _train_id, leg_index, train = departures[index]
+                    # a chain of rides can only get later, so it is pruned once it can
+                    # no longer beat the deadline or the best arrival found so far
+                    if best_arrival is not None and depart_time >= best_arrival:
+                        break
+                    if train in boarded:
+                        continue
+                    boarded.add(train)
+
+                    legs = self._legs[train]
+                    max_capacity = train.max_capacity()
+                    for last_leg in range(leg_index, len(legs)):
+                        leg = legs[last_leg]
+                        if leg['load'] + weight > max_capacity:
+                            break
+                        if best_arrival is not None and leg['arrive_time'] >= best_arrival:
+                            break
+                        arrive_station = leg['arrive_station']
+                        best = improved.get(arrive_station, arrivals.get(arrive_station, None))
+                        if best is not None and best[0] <= leg['arrive_time']:
+                            continue
+                        improved[arrive_station] = (
+                            leg['arrive_time'],
+                            station,
+                            arrival_round,
+                            train,
+                            leg_index,
+                            last_leg
+                        )
+                        if arrive_station == destination:
+                            best_arrival = leg['arrive_time']
+
+            if len(improved) == 0:
+                break
+            labels.append(improved)
+            for station, label in improved.items():
+                arrivals[station] = (label[0], no_of_ride)
+            marked = list(improved)
+
+        if destination not in arrivals:
+            return None, None
+        arrival_time, arrival_round = arrivals[destination]
+        return arrival_time, self._rides(labels, destination, arrival_round)
+
+    def _rides(self, labels, station, arrival_round):
+        rides = list()
+        while arrival_round > 0:
+            _arrival_time, station, previous_round, train, first_leg, last_leg = \
+                labels[arrival_round][station]
+            rides.append((train, first_leg, last_leg))
+            arrival_round = previous_round
+        rides.reverse()
+        return rides
+
+    def reserve(self, rides, weight):
+        for train, first_leg, last_leg in rides:
+            legs = self._legs[train]
+            for leg_index in range(first_leg, last_leg + 1):
+                legs[leg_index]['load'] += weight
@@ -1,8 +1,28 @@
 import math
-import networkx as nx
-from copy import deepcopy
-
+import os
+import time
+from collections import Counter
+
+from src.checkpoint import (
+    DEFAULT_CHECKPOINT_INTERVAL,
+    fingerprint_input,
+    load_checkpoint,
+    save_checkpoint
+)
+from src.network import TrainNetwork, label_components, read_binary_train_network
+from src.ordering import (
+    PACKAGE_ORDERINGS,
+    order_by_manifest,
+    order_by_nearest_train,
+    order_by_origin,
+    order_by_space_filling,
+    order_by_weight
+)
 from src.package import Package, STATUS
+from src.relay import DEFAULT_MAX_TRANSFERS, Timetable
+from src.shortest_path import ShortestPathCache
+from src.tour import Tour, find_cheapest_insertion
+from src.trace import ASSIGN, CANDIDATE, HITCHHIKE, RELAY, SKIP
 from src.train import Train
 
 
@@ -25,80 +45,101 @@ def validate_input(stations, routes, deliveries, trains):
     if len(trains) == 0:
         raise ValueError('NO_TRAIN_TO_DELIVER')
 
-    try:
-        stations = [str(station) for station in stations]
-        if len(set(stations)) != len(stations):
-            raise ValueError('DUPLICATED_STATION_NAME')
-
-        route_names = list()
-        for i in range(len(routes)):
-            route_name, left_station, right_station, time_cost = routes[i]
-
-            if left_station == right_station:
-                raise ValueError('INVALID_ROUTE_CONNECTING_A_STATION_TO_ITSELF')
-
-            if route_name in route_names:
-                raise ValueError('DUPLICATED_ROUTE_NAME')
-            route_names.append(route_name)
-
-            if int(time_cost) <= 0:
-                raise ValueError('ROUTE_TIME_COST_MUST_BE_BIGGER_THAN_ZERO')
-            if str(left_station) not in stations or str(right_station) not in stations:
-                raise ValueError('MISSING_STATION_IN_STATIONS')
-            routes[i] = (
-                str(route_name),
-                str(left_station),
-                str(right_station),
-                int(time_cost)
-            )
+    stations = validate_network(stations, routes)
+    validate_manifest(set(stations), deliveries, trains)
+
+
+# validate the stations and routes, returns the station names as strings
+def validate_network(stations, routes):
+    stations = [str(station) for station in stations]
+    station_names = set(stations)
+    if len(station_names) != len(stations):
+        raise ValueError('DUPLICATED_STATION_NAME')
+
+    route_names = set()
+    for i in range(len(routes)):
+        route_name, left_station, right_station, time_cost = routes[i]
+
+        if left_station == right_station:
+            raise ValueError('INVALID_ROUTE_CONNECTING_A_STATION_TO_ITSELF')
+
+        if route_name in route_names:
+            raise ValueError('DUPLICATED_ROUTE_NAME')
+        route_names.add(route_name)
+
+        if int(time_cost) <= 0:
+            raise ValueError('ROUTE_TIME_COST_MUST_BE_BIGGER_THAN_ZERO')
+        if str(left_station) not in station_names or str(right_station) not in station_names:
+            raise ValueError('MISSING_STATION_IN_STATIONS')
+        routes[i] = (
+            str(route_name),
+            str(left_station),
+            str(right_station),
+            int(time_cost)
+        )
+    return stations
+
+
+# stations may be any container of station names, e.g. a station map
+def validate_manifest(stations, deliveries, trains):
+    package_names = set()
+    for i in range(len(deliveries)):
+        package_name, origin, destination, package_weight = deliveries[i]
+
+        if package_name in package_names:
+            raise ValueError('DUPLICATED_PACKAGE_NAME')
+        package_names.add(package_name)
+
+        if int(package_weight) <= 0:
+            raise ValueError('PACKAGE_WEIGHT_MUST_BE_BIGGER_THAN_ZERO')
+        if str(origin) not in stations or str(destination) not in stations:
+            raise ValueError('MISSING_STATION_IN_STATIONS')
+        deliveries[i] = (
+            str(package_name),
+            str(origin),
+            str(destination),
+            int(package_weight)
+        )
 
-        package_names = list()
-        for i in range(len(deliveries)):
-            package_name, origin, destination, package_weight = deliveries[i]
-
-            if package_name in package_names:
-                raise ValueError('DUPLICATED_PACKAGE_NAME')
-            package_names.append(package_name)
-
-            if int(package_weight) <= 0:
-                raise ValueError('PACKAGE_WEIGHT_MUST_BE_BIGGER_THAN_ZERO')
-            if str(origin) not in stations or str(destination) not in stations:
-                raise ValueError('MISSING_STATION_IN_STATIONS')
-            deliveries[i] = (
-                str(package_name),
-                str(origin),
-                str(destination),
-                int(package_weight)
-            )
+    train_names = set()
+    for i in range(len(trains)):
+        train_name, train_station, train_max_capacity = trains[i]
+
+        if train_name in train_names:
+            raise ValueError('DUPLICATE_TRAIN_NAME')
+        train_names.add(train_name)
+
+        if int(train_max_capacity) <= 0:
+            raise ValueError('TRAIN_MAX_CAPACITY_MUST_BE_BIGGER_THAN_ZERO')
+        if str(train_station) not in stations:
+            raise ValueError('MISSING_STATION_IN_STATIONS')
+        trains[i] = (
+            str(train_name),
+            str(train_station),
+            int(train_max_capacity)
+        )
 
-        train_names = list()
-        for i in range(len(trains)):
-            train_name, train_station, train_max_capacity = trains[i]
-
-            if train_name in train_names:
-                raise ValueError('DUPLICATE_TRAIN_NAME')
-            train_names.append(train_name)
-
-            if int(train_max_capacity) <= 0:
-                raise ValueError('TRAIN_MAX_CAPACITY_MUST_BE_BIGGER_THAN_ZERO')
-            if str(train_station) not in stations:
-                raise ValueError('MISSING_STATION_IN_STATIONS')
-            trains[i] = (
-                str(train_name),
-                str(train_station),
-                int(train_max_capacity)
-            )
-    except Exception as e:
-        raise e
 
+# the compressed sparse row network needs nothing beyond numpy, networkx is only
+# imported when its graph is asked for
+NETWORK_BACKENDS = ('csr', 'networkx')
 
-def construct_train_network(stations, routes):
+
+def construct_train_network(stations, routes, backend='csr'):
+    if backend not in NETWORK_BACKENDS:
+        raise ValueError('INVALID_NETWORK_BACKEND')
+    if backend == 'csr':
+        return TrainNetwork.from_routes(stations, routes)
+
+    import networkx as nx
     station_map = dict()
     train_network = nx.Graph()
     for position, name in enumerate(stations):
         station_map[name] = position
         train_network.add_node(position, name=name)
 
+    left_nodes = list()
+    right_nodes = list()
     for route in routes:
         route_name, left_station, right_station, time_cost = route
         train_network.add_edge(
@@ -107,6 +148,16 @@ def construct_train_network(stations, routes):
             weight=time_cost,
             name=route_name
         )
+        left_nodes.append(station_map[left_station])
+        right_nodes.append(station_map[right_station])
+
+    # stations in different components can never reach each other, labelling them
+    # once lets unreachable pairs be rejected without a search
+    train_network.graph['components'] = label_components(
+        len(station_map),
+        left_nodes,
+        right_nodes
+    )
     return train_network, station_map
 
 
@@ -155,12 +206,19 @@ def construct_trains(trains, station_map):
     return train_collections
 
 
+def get_station_components(train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.components()
+    return train_network.graph['components']
+
+
+def is_reachable(left_node, right_node, train_network):
+    components = get_station_components(train_network)
+    return components[left_node] == components[right_node]
+
+
 def get_shortest_path_info(left_node, right_node, shortest_paths):
-    try:
-        time_cost, path = shortest_paths[left_node][right_node]
-        return time_cost, path
-    except TypeError as _e:
-        return None, None
+    return shortest_paths.get(left_node, right_node)
 
 
 def set_shortest_path_info(
@@ -168,10 +226,21 @@ def set_shortest_path_info(
     right_node,
     time_cost,
     path,
-    shortest_paths
+    shortest_paths,
+    path_costs=None
 ):
-    shortest_paths[left_node][right_node] = time_cost, path
-    shortest_paths[right_node][left_node] = time_cost, path[::-1]
+    # the path is stored once in the shortest path tree of left_node, the reverse
+    # direction is rebuilt from the same tree
+    shortest_paths.set(left_node, right_node, time_cost, path, path_costs)
+
+
+def compute_path_costs(path, train_network):
+    path_costs = [0]
+    for index in range(1, len(path)):
+        path_costs.append(
+            path_costs[-1] + get_route_time_cost(path[index - 1], path[index], train_network)
+        )
+    return path_costs
 
 
 def compute_shortest_path(
@@ -186,31 +255,91 @@ def compute_shortest_path(
         shortest_paths
     )
     if time_cost is None or path is None:
-        try:
-            # dijkstra is used as a train network is more likely a sparse graph
-            time_cost = nx.dijkstra_path_length(
-                train_network,
-                left_node,
-                right_node
-            )
-            path = nx.dijkstra_path(
-                train_network,
-                left_node,
-                right_node
-            )
-            set_shortest_path_info(
-                left_node,
-                right_node,
-                time_cost,
-                path,
-                shortest_paths
-            )
-        except nx.NetworkXNoPath as _e:
-            raise ValueError('NO_PATH_TO_DELIVER_PACKAGE')
+        time_cost, path = search_and_cache_shortest_path(
+            left_node,
+            right_node,
+            shortest_paths,
+            train_network
+        )
+    return time_cost, path
+
 
+# the cost alone is answered from the cached tree without rebuilding the path
+def compute_shortest_path_cost(
+    left_node,
+    right_node,
+    shortest_paths,
+    train_network
+):
+    time_cost = shortest_paths.get_distance(left_node, right_node)
+    if time_cost is None:
+        time_cost, _path = search_and_cache_shortest_path(
+            left_node,
+            right_node,
+            shortest_paths,
+            train_network
+        )
+    return time_cost
+
+
+def search_and_cache_shortest_path(
+    left_node,
+    right_node,
+    shortest_paths,
+    train_network
+):
+    if not is_reachable(left_node, right_node, train_network):
+        raise ValueError('NO_PATH_TO_DELIVER_PACKAGE')
+    time_cost, path = search_shortest_path(left_node, right_node, train_network)
+    if time_cost is None:
+        raise ValueError('NO_PATH_TO_DELIVER_PACKAGE')
+    set_shortest_path_info(
+        left_node,
+        right_node,
+        time_cost,
+        path,
+        shortest_paths,
+        compute_path_costs(path, train_network)
+    )
     return time_cost, path
 
 
+# dijkstra is used as a train network is more likely a sparse graph
+# the bidirectional search returns both cost and path in a single run
+# and stops as soon as the forward and backward frontiers meet
+def search_shortest_path(left_node, right_node, train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.shortest_path(left_node, right_node)
+    import networkx as nx
+    try:
+        return nx.bidirectional_dijkstra(train_network, left_node, right_node)
+    except nx.NetworkXNoPath as _e:
+        return None, None
+
+
+# reject packages that break the assumptions of the README before any routing begins:
+# the destination must be reachable from the origin, and a train big enough for
+# the package must start in the same component as the package
+def validate_deliverability(package_collections, train_collections, train_network):
+    components = get_station_components(train_network)
+    component_capacity = dict()
+    for train in train_collections:
+        component = components[train.locate()]
+        component_capacity[component] = max(
+            component_capacity.get(component, 0),
+            train.max_capacity()
+        )
+
+    for package in package_collections:
+        if package.status() == STATUS['delivered']:
+            continue
+        component = components[package.origin()]
+        if component != components[package.destination()]:
+            raise ValueError('NO_PATH_TO_DELIVER_PACKAGE')
+        if component_capacity.get(component, 0) < package.weight():
+            raise ValueError('PACKAGE_CANNOT_BE_DELIVERED_BY_ANY_TRAIN')
+
+
 def compute_delivery_shortest_paths(
     package_collections,
     shortest_paths,
@@ -232,43 +361,74 @@ def find_best_delivery_train(
     train_collections,
     shortest_paths,
     train_network,
-    station_inventory
+    station_inventory,
+    trace=None
 ):
     delivery_train = None
-    delivery_train_pickup_path = None
     delivery_train_pickup_cost = math.inf
 
     for train in train_collections:
         if train.max_capacity() < package.weight():
+            if trace is not None:
+                trace.record(CANDIDATE, package.name(), train.name(), reason='capacity')
             continue
 
-        try:
-            pickup_time_cost, pickup_path = compute_shortest_path(
-                train.locate(),
-                package.origin(),
-                shortest_paths,
-                train_network
-            )
         # when there is no path from train to package
-        except ValueError as _e:
+        if not is_reachable(train.locate(), package.origin(), train_network):
+            if trace is not None:
+                trace.record(CANDIDATE, package.name(), train.name(), reason='unreachable')
             continue
 
+        # candidates are compared on cost, only the path of the chosen train is
+        # rebuilt from the tree
+        pickup_time_cost = compute_shortest_path_cost(
+            train.locate(),
+            package.origin(),
+            shortest_paths,
+            train_network
+        )
+
         # when package is intermediately deposited at a later time by another train
         # the current train will reach the package before it is deposited
         drop_time = station_inventory[package.origin()][package.name()]['drop_time']
         if (train.elapsed_time() + pickup_time_cost) < drop_time:
+            if trace is not None:
+                trace.record(
+                    CANDIDATE,
+                    package.name(),
+                    train.name(),
+                    cost=pickup_time_cost,
+                    elapsed=train.elapsed_time(),
+                    reason='drop_time'
+                )
             continue
 
+        if trace is not None:
+            trace.record(
+                CANDIDATE,
+                package.name(),
+                train.name(),
+                cost=pickup_time_cost,
+                elapsed=train.elapsed_time()
+            )
         # pick the nearest train that has done least deliveries (lowest time elapsed)
         pickup_cost = pickup_time_cost + train.elapsed_time()
         if pickup_cost < delivery_train_pickup_cost:
             delivery_train = train
-            delivery_train_pickup_path = pickup_path
             delivery_train_pickup_cost = pickup_cost
 
     if delivery_train is None:
         raise ValueError('PACKAGE_CANNOT_BE_DELIVERED_BY_ANY_TRAIN')
-
+    delivery_train_pickup_path = shortest_paths.path(delivery_train.locate(), package.origin())
+
+    if trace is not None:
+        trace.record(
+            ASSIGN,
+            package.name(),
+            delivery_train.name(),
+            cost=delivery_train_pickup_cost - delivery_train.elapsed_time(),
+            elapsed=delivery_train.elapsed_time()
+        )
     return delivery_train, delivery_train_pickup_cost, delivery_train_pickup_path
 
 
@@ -304,7 +464,8 @@ def load_package(
     package_collections,
     shortest_paths,
     future_path,
-    train_network
+    train_network,
+    trace=None
 ):
     inventory = retrieve_station_inventory(station, station_inventory)
     if not inventory or len(inventory) == 0:
@@ -313,6 +474,7 @@ def load_package(
     # check what package the train can load
     packages_to_load = list()
     destinations = list()
+    hitchhike_weight = 0
     for package_name in inventory:
         package_index = inventory[package_name]['index']
         inventory_package = package_collections[package_index]
@@ -324,6 +486,14 @@ def load_package(
         # technically the package isn't present in this station yet
         drop_time = inventory[package_name]['drop_time']
         if drop_time > train.elapsed_time():
+            if trace is not None:
+                trace.record(
+                    SKIP,
+                    package_name,
+                    train.name(),
+                    elapsed=train.elapsed_time(),
+                    reason='drop_time'
+                )
             continue
 
         # package is the target package assigned to the train
@@ -333,8 +503,16 @@ def load_package(
             continue
 
         # package weight will exceed train capacity after accounting for the assigned
-        # package weight
-        if not train.check_package(inventory_package, package.weight()):
+        # package weight and the other packages loaded at this station
+        if not train.check_package(inventory_package, package.weight() + hitchhike_weight):
+            if trace is not None:
+                trace.record(
+                    SKIP,
+                    package_name,
+                    train.name(),
+                    elapsed=train.elapsed_time(),
+                    reason='capacity'
+                )
             continue
 
         # check if the train can deliver this package to a nearer intermediate station
@@ -349,7 +527,25 @@ def load_package(
             if delivery_path[index] in future_path:
                 packages_to_load.append(inventory_package)
                 destinations.append(delivery_path[index])
+                hitchhike_weight += inventory_package.weight()
+                if trace is not None:
+                    trace.record(
+                        HITCHHIKE,
+                        package_name,
+                        train.name(),
+                        station=get_station_name(delivery_path[index], train_network),
+                        elapsed=train.elapsed_time()
+                    )
                 break
+        else:
+            if trace is not None:
+                trace.record(
+                    SKIP,
+                    package_name,
+                    train.name(),
+                    elapsed=train.elapsed_time(),
+                    reason='not_on_path'
+                )
 
     if len(packages_to_load) == 0:
         return False
@@ -383,9 +579,11 @@ def push_station_inventory(
 
 def drop_package(train, station, station_inventory, package_collections):
     # get the packages to be dropped from the train
-    packages_to_drop = deepcopy(train.packages_to_drop())
+    packages_to_drop = train.packages_to_drop()
     if packages_to_drop is None or len(packages_to_drop) == 0:
         return False
+    # the train forgets each package as it is dropped, iterate over a copy
+    packages_to_drop = dict(packages_to_drop)
     for package_name in packages_to_drop:
         package_index = packages_to_drop[package_name]['index']
         package = package_collections[package_index]
@@ -403,118 +601,665 @@ def drop_package(train, station, station_inventory, package_collections):
 
 
 def get_route_time_cost(left_node, right_node, train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.route_time_cost(left_node, right_node)
     return train_network[left_node][right_node]['weight']
 
 
 def get_route_name(left_node, right_node, train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.route_name(left_node, right_node)
     return train_network[left_node][right_node]['name']
 
 
 def get_station_name(station, train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.station_name(station)
     return train_network.nodes[station]['name']
 
 
-def route_package_train(stations, routes, deliveries, trains):
-    validate_input(stations, routes, deliveries, trains)
+def get_station_neighbours(station, train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.neighbours(station)
+    return [
+        (neighbour, route['weight'])
+        for neighbour, route in train_network[station].items()
+    ]
+
+
+def get_no_of_station(train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.no_of_station()
+    return train_network.number_of_nodes()
+
+
+# the order in which the main loop plans packages, see src.ordering
+def order_packages(
+    ordering,
+    package_collections,
+    train_collections,
+    train_network
+):
+    if ordering not in PACKAGE_ORDERINGS:
+        raise ValueError('UNKNOWN_PACKAGE_ORDERING')
+    if ordering == 'origin':
+        return order_by_origin(
+            package_collections,
+            get_station_components(train_network)
+        )
+    if ordering == 'nearest_train':
+        # one full tree per train station answers the distance to every origin, the
+        # trees go in a cache of their own so that the ordering does not warm the
+        # cache the planning reports its hit rate on
+        ordering_paths = ShortestPathCache(get_no_of_station(train_network))
+        for train in train_collections:
+            compute_shortest_path_tree(train.locate(), ordering_paths, train_network)
+        return order_by_nearest_train(
+            package_collections,
+            train_collections,
+            get_station_components(train_network),
+            ordering_paths.distance
+        )
+    if ordering == 'weight':
+        return order_by_weight(package_collections)
+    if ordering == 'space_filling':
+        return order_by_space_filling(
+            package_collections,
+            get_no_of_station(train_network),
+            lambda station: get_station_neighbours(station, train_network)
+        )
+    return order_by_manifest(package_collections)
+
+
+def advance_train(
+    train,
+    journey_path,
+    index,
+    loaded_packages,
+    dropped_packages,
+    train_network,
+    timetable=None
+):
+    # move train to next station
+    if index <= len(journey_path) - 2:
+        next_route_duration = get_route_time_cost(
+            journey_path[index],
+            journey_path[index + 1],
+            train_network
+        )
+        if timetable is not None:
+            timetable.add_leg(
+                train,
+                journey_path[index],
+                train.elapsed_time(),
+                journey_path[index + 1],
+                train.elapsed_time() + next_route_duration,
+                train.max_capacity() - train.capacity(),
+                len(train.retrieve_log())
+            )
+        train.record_log(
+            get_station_name(journey_path[index], train_network),
+            get_station_name(journey_path[index + 1], train_network),
+            get_route_name(
+                journey_path[index],
+                journey_path[index + 1],
+                train_network
+            ),
+            next_route_duration,
+            loaded_packages,
+            dropped_packages
+        )
+        train.move(journey_path[index + 1], next_route_duration)
+    # when the train reaches its destination
+    else:
+        train.record_log(
+            get_station_name(journey_path[index], train_network),
+            None,
+            None,
+            None,
+            loaded_packages,
+            dropped_packages
+        )
+
+
+# deliver a package along a chain of legs trains already travel, the package boards
+# and leaves each train at stops that are already in the train log
+def relay_package(package, rides, station_inventory, timetable):
+    pop_station_inventory(package, station_inventory)
+    package.load()
+    for train, first_leg, last_leg in rides:
+        legs = timetable.legs(train)
+        train.amend_log(legs[first_leg]['log_index'], [package.name()], list())
+        # the log entry after a leg is made when the train arrives at its end
+        train.amend_log(legs[last_leg]['log_index'] + 1, list(), [package.name()])
+    timetable.reserve(rides, package.weight())
+    package.drop(package.destination())
+
+
+def prefetch_shortest_path_trees(
+    shared_index,
+    package_indices,
+    package_collections,
+    shortest_paths
+):
+    sources = list()
+    for package_index in package_indices:
+        package = package_collections[package_index]
+        if package.status() == STATUS['delivered']:
+            continue
+        if package.origin() in sources or shortest_paths.has_tree(package.origin()):
+            continue
+        sources.append(package.origin())
+    if len(sources) > 0:
+        shared_index.compute(sources, shortest_paths)
+
+
+def compute_shortest_path_tree(source, shortest_paths, train_network):
+    if shortest_paths.has_tree(source):
+        return
+    if isinstance(train_network, TrainNetwork):
+        distances, predecessors = train_network.shortest_path_tree(source)
+    else:
+        no_of_station = get_no_of_station(train_network)
+        distances = [None] * no_of_station
+        predecessors = [None] * no_of_station
+        import networkx as nx
+        station_predecessors, station_distances = nx.dijkstra_predecessor_and_distance(
+            train_network,
+            source
+        )
+        for station, time_cost in station_distances.items():
+            distances[station] = time_cost
+            if len(station_predecessors[station]) > 0:
+                predecessors[station] = station_predecessors[station][0]
+    shortest_paths.set_tree(source, distances, predecessors)
+
+
+# cheapest insertion planner for pickup and delivery: every package is inserted as a
+# pickup and drop pair into the tour of one train at the cheapest feasible position,
+# then every train runs its tour
+def plan_tours(
+    package_order,
+    package_collections,
+    train_collections,
+    station_inventory,
+    shortest_paths,
+    train_network,
+    trace=None
+):
+    components = get_station_components(train_network)
+    tours = [Tour(train.locate(), train.max_capacity()) for train in train_collections]
+
+    def distance(left_node, right_node):
+        return compute_shortest_path_cost(left_node, right_node, shortest_paths, train_network)
+
+    for package_index in package_order:
+        package = package_collections[package_index]
+        if package.status() == STATUS['delivered']:
+            continue
+
+        # full trees from the origin and the destination make every insertion
+        # cost a cache lookup
+        compute_shortest_path_tree(package.origin(), shortest_paths, train_network)
+        compute_shortest_path_tree(package.destination(), shortest_paths, train_network)
+        candidates = [
+            tour_index for tour_index, train in enumerate(train_collections)
+            if train.max_capacity() >= package.weight() and
+            components[train.locate()] == components[package.origin()]
+        ]
+        insertion = find_cheapest_insertion(
+            tours,
+            candidates,
+            package,
+            lambda station: shortest_paths.distance(package.origin(), station),
+            lambda station: shortest_paths.distance(package.destination(), station)
+        )
+        if insertion is None:
+            raise ValueError('PACKAGE_CANNOT_BE_DELIVERED_BY_ANY_TRAIN')
+
+        tour_index, (added_cost, pickup_position, drop_position) = insertion
+        if trace is not None:
+            trace.record(
+                ASSIGN,
+                package.name(),
+                train_collections[tour_index].name(),
+                cost=added_cost,
+                elapsed=tours[tour_index].duration()
+            )
+        tours[tour_index].insert(
+            pickup_position,
+            drop_position,
+            package_index,
+            package.origin(),
+            package.destination(),
+            package.weight(),
+            distance
+        )
+
+    for train, tour in zip(train_collections, tours):
+        run_tour(
+            train,
+            tour,
+            station_inventory,
+            package_collections,
+            shortest_paths,
+            train_network
+        )
 
-    train_network, station_map = construct_train_network(stations, routes)
-    no_of_station = len(station_map)
+
+def run_tour(
+    train,
+    tour,
+    station_inventory,
+    package_collections,
+    shortest_paths,
+    train_network
+):
+    if len(tour.stops()) == 0:
+        return
+
+    # expand the stops into the stations the train passes, pickups are attached to
+    # the position in the journey where the stop is made
+    journey_path = [train.locate()]
+    pickups = dict()
+    for station, package_index, weight in tour.stops():
+        if station != journey_path[-1]:
+            _, path = compute_shortest_path(
+                journey_path[-1],
+                station,
+                shortest_paths,
+                train_network
+            )
+            journey_path.extend(path[1:])
+        if weight > 0:
+            pickups.setdefault(len(journey_path) - 1, list()).append(package_index)
+
+    for index in range(len(journey_path)):
+        loaded_packages = list()
+        dropped_packages = list()
+
+        dropped_inventory = drop_package(
+            train,
+            journey_path[index],
+            station_inventory,
+            package_collections
+        )
+        if dropped_inventory:
+            dropped_packages.extend(dropped_inventory)
+
+        for package_index in pickups.get(index, list()):
+            package = package_collections[package_index]
+            pop_station_inventory(package, station_inventory)
+            train.load_package(package, package.destination())
+            package.load()
+            loaded_packages.append(package.name())
+
+        advance_train(
+            train,
+            journey_path,
+            index,
+            loaded_packages,
+            dropped_packages,
+            train_network
+        )
+
+
+# the arrays that tell one network apart from another, hashed into the fingerprint
+# of a checkpoint so that it is never resumed on changed routes
+def get_network_arrays(train_network):
+    if isinstance(train_network, TrainNetwork):
+        return train_network.arrays()
+    return [
+        repr(sorted(train_network.nodes(data='name'))).encode('utf-8'),
+        repr(sorted(train_network.edges(data=True))).encode('utf-8')
+    ]
+
+
+def save_planning_checkpoint(
+    checkpoint_path,
+    fingerprint,
+    position,
+    package_order,
+    train_collections,
+    package_collections,
+    station_inventory,
+    timetable,
+    shortest_paths,
+    checkpoint_cache
+):
+    save_checkpoint(checkpoint_path, {
+        'fingerprint': fingerprint,
+        'position': position,
+        'package_order': package_order,
+        'trains': train_collections,
+        'packages': package_collections,
+        'station_inventory': station_inventory,
+        'timetable': timetable,
+        'shortest_paths': shortest_paths if checkpoint_cache else None
+    })
+
+
+# greedy sends the nearest train on a pickup and delivery journey per package and
+# loads waiting packages on the way, insertion builds a multi-stop tour per train
+PLANNERS = ('greedy', 'insertion')
+
+# number of packages whose origins get full shortest path trees from the process
+# pool at a time
+DEFAULT_BATCH_SIZE = 256
+
+
+# plan deliveries on an already constructed network, shortest_paths may be carried
+# over between plans on the same network so later plans start with a warm cache
+# with a checkpoint_path the planning state is saved every checkpoint_interval
+# seconds, a later call on the same input with resume=True continues from the last
+# checkpoint instead of starting over
+def plan_package_train(
+    deliveries,
+    trains,
+    train_network,
+    station_map,
+    shortest_paths,
+    ordering='manifest',
+    planner='greedy',
+    relay=False,
+    max_transfers=DEFAULT_MAX_TRANSFERS,
+    processes=1,
+    batch_size=DEFAULT_BATCH_SIZE,
+    trace=None,
+    checkpoint_path=None,
+    checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+    checkpoint_cache=False,
+    resume=False
+):
+    if planner not in PLANNERS:
+        raise ValueError('UNKNOWN_PLANNER')
+    if planner != 'greedy' and checkpoint_path is not None:
+        raise ValueError('CHECKPOINT_NOT_SUPPORTED_BY_PLANNER')
+    if planner != 'greedy' and relay:
+        raise ValueError('RELAY_NOT_SUPPORTED_BY_PLANNER')
+    if batch_size < 1:
+        raise ValueError('BATCH_SIZE_MUST_BE_BIGGER_THAN_ZERO')
+    # with relay the legs trains travel are kept so that packages can be relayed
+    # through them instead of sending another train
+    timetable = Timetable() if relay else None
 
     train_collections = construct_trains(trains, station_map)
     package_collections, station_inventory = construct_packages(
         deliveries,
         station_map
     )
-    shortest_paths = [[None for _i in range(no_of_station)] for _j in range(no_of_station)]
-
-    # calculate the shortest path for package deliveries
-    compute_delivery_shortest_paths(
+    validate_deliverability(
         package_collections,
-        shortest_paths,
+        train_collections,
         train_network
     )
 
-    for package in package_collections:
-        if package.status() == STATUS['delivered']:
-            continue
+    start_position = 0
+    package_order = None
+    if checkpoint_path is not None:
+        fingerprint = fingerprint_input(
+            deliveries,
+            trains,
+            get_network_arrays(train_network),
+            (ordering, planner, relay, max_transfers)
+        )
+        checkpoint = load_checkpoint(checkpoint_path, fingerprint) if resume else None
+        if checkpoint is not None:
+            start_position = checkpoint['position']
+            package_order = checkpoint['package_order']
+            train_collections = checkpoint['trains']
+            package_collections = checkpoint['packages']
+            station_inventory = checkpoint['station_inventory']
+            timetable = checkpoint['timetable']
+            if checkpoint['shortest_paths'] is not None:
+                shortest_paths = checkpoint['shortest_paths']
+        last_checkpoint_time = time.monotonic()
+
+    # calculate the shortest path for package deliveries, with more than one process
+    # they come from the trees computed by the pool
+    if processes <= 1:
+        compute_delivery_shortest_paths(
+            package_collections,
+            shortest_paths,
+            train_network
+        )
 
-        train, pickup_cost, pickup_path = find_best_delivery_train(
-            package,
+    if package_order is None:
+        package_order = order_packages(
+            ordering,
+            package_collections,
+            train_collections,
+            train_network
+        )
+
+    if planner == 'insertion':
+        plan_tours(
+            package_order,
+            package_collections,
             train_collections,
+            station_inventory,
             shortest_paths,
             train_network,
-            station_inventory
-        )
-        _, delivery_path = get_shortest_path_info(
-            package.origin(),
-            package.destination(),
-            shortest_paths
+            trace
         )
-        journey_path = combine_paths(pickup_path, delivery_path)
-        journey_length = len(journey_path)
-
-        for index in range(journey_length):
-            loaded_packages = list()
-            dropped_packages = list()
+        # the greedy loop below has nothing left to deliver
+        start_position = len(package_order)
+
+    # with more than one process the shortest path trees from the origins of the
+    # next batch of packages are computed in parallel ahead of the serial assignment
+    shared_index = None
+    if processes > 1 and start_position < len(package_order):
+        from src.parallel import SharedShortestPathIndex
+        shared_index = SharedShortestPathIndex(train_network, processes, batch_size)
+    try:
+        for position in range(start_position, len(package_order)):
+            if shared_index is not None and \
+                    (position - start_position) % shared_index.batch_size() == 0:
+                prefetch_shortest_path_trees(
+                    shared_index,
+                    package_order[position:position + shared_index.batch_size()],
+                    package_collections,
+                    shortest_paths
+                )
 
-            dropped_inventory = drop_package(
-                train,
-                journey_path[index],
-                station_inventory,
-                package_collections
-            )
-            if dropped_inventory:
-                dropped_packages.extend(dropped_inventory)
+            package = package_collections[package_order[position]]
+            if package.status() == STATUS['delivered']:
+                continue
+
+            if checkpoint_path is not None and \
+                    time.monotonic() - last_checkpoint_time >= checkpoint_interval:
+                save_planning_checkpoint(
+                    checkpoint_path,
+                    fingerprint,
+                    position,
+                    package_order,
+                    train_collections,
+                    package_collections,
+                    station_inventory,
+                    timetable,
+                    shortest_paths,
+                    checkpoint_cache
+                )
+                last_checkpoint_time = time.monotonic()
 
-            loaded_inventory = load_package(
+            train, pickup_cost, pickup_path = find_best_delivery_train(
                 package,
-                train,
-                journey_path[index],
+                train_collections,
+                shortest_paths,
+                train_network,
                 station_inventory,
-                package_collections,
+                trace
+            )
+            # the package may have been dropped at an intermediate station since the
+            # delivery paths were computed, so its current origin may be uncached
+            delivery_cost, delivery_path = compute_shortest_path(
+                package.origin(),
+                package.destination(),
                 shortest_paths,
-                journey_path[index+1:],
                 train_network
             )
-            if loaded_inventory:
-                loaded_packages.extend(loaded_inventory)
 
-            # move train to next station
-            if index <= journey_length - 2:
-                next_route_duration = get_route_time_cost(
+            if timetable is not None:
+                # relay the package when trains already moving get it there before the
+                # best train sent for it could
+                relay_arrival, rides = timetable.earliest_arrival(
+                    package.origin(),
+                    package.destination(),
+                    station_inventory[package.origin()][package.name()]['drop_time'],
+                    package.weight(),
+                    max_transfers,
+                    pickup_cost + delivery_cost
+                )
+                if relay_arrival is not None:
+                    relay_package(package, rides, station_inventory, timetable)
+                    if trace is not None:
+                        for relay_train, first_leg, _last_leg in rides:
+                            leg = timetable.legs(relay_train)[first_leg]
+                            trace.record(
+                                RELAY,
+                                package.name(),
+                                relay_train.name(),
+                                station=get_station_name(leg['depart_station'], train_network),
+                                cost=relay_arrival,
+                                elapsed=leg['depart_time']
+                            )
+                    continue
+
+            journey_path = combine_paths(pickup_path, delivery_path)
+            journey_length = len(journey_path)
+            # stations the train has yet to pass, kept in place of slicing the journey
+            future_stations = Counter(journey_path)
+
+            for index in range(journey_length):
+                future_stations[journey_path[index]] -= 1
+                if future_stations[journey_path[index]] == 0:
+                    del future_stations[journey_path[index]]
+
+                loaded_packages = list()
+                dropped_packages = list()
+
+                dropped_inventory = drop_package(
+                    train,
                     journey_path[index],
-                    journey_path[index + 1],
-                    train_network
+                    station_inventory,
+                    package_collections
                 )
-                train.record_log(
-                    get_station_name(journey_path[index], train_network),
-                    get_station_name(journey_path[index + 1], train_network),
-                    get_route_name(
-                        journey_path[index],
-                        journey_path[index + 1],
-                        train_network
-                    ),
-                    next_route_duration,
-                    loaded_packages,
-                    dropped_packages
+                if dropped_inventory:
+                    dropped_packages.extend(dropped_inventory)
+
+                loaded_inventory = load_package(
+                    package,
+                    train,
+                    journey_path[index],
+                    station_inventory,
+                    package_collections,
+                    shortest_paths,
+                    future_stations,
+                    train_network,
+                    trace
                 )
-                train.move(journey_path[index + 1], next_route_duration)
-            # when the train reaches its destination
-            else:
-                train.record_log(
-                    get_station_name(journey_path[index], train_network),
-                    None,
-                    None,
-                    None,
+                if loaded_inventory:
+                    loaded_packages.extend(loaded_inventory)
+
+                advance_train(
+                    train,
+                    journey_path,
+                    index,
                     loaded_packages,
-                    dropped_packages
+                    dropped_packages,
+                    train_network,
+                    timetable
                 )
+    finally:
+        if shared_index is not None:
+            shared_index.close()
+
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
     logs = list()
     for train in train_collections:
         logs.extend(train.retrieve_log())
 
     logs.sort(key=lambda x: x['time'])
+    return logs
+
+
+def route_package_train(
+    stations,
+    routes,
+    deliveries,
+    trains,
+    ordering='manifest',
+    planner='greedy',
+    relay=False,
+    max_transfers=DEFAULT_MAX_TRANSFERS,
+    processes=1,
+    batch_size=DEFAULT_BATCH_SIZE,
+    trace=None,
+    checkpoint_path=None,
+    checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+    checkpoint_cache=False,
+    resume=False,
+    backend='csr'
+):
+    validate_input(stations, routes, deliveries, trains)
+
+    train_network, station_map = construct_train_network(stations, routes, backend)
+    shortest_paths = ShortestPathCache(len(station_map))
+
+    logs = plan_package_train(
+        deliveries,
+        trains,
+        train_network,
+        station_map,
+        shortest_paths,
+        ordering=ordering,
+        planner=planner,
+        relay=relay,
+        max_transfers=max_transfers,
+        processes=processes,
+        batch_size=batch_size,
+        trace=trace,
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval=checkpoint_interval,
+        checkpoint_cache=checkpoint_cache,
+        resume=resume
+    )
+    print('Chronological train schedule')
+    for log in logs:
+        print(log)
+    return logs
+
+
+def load_binary_train_network(network_prefix, deliveries, trains):
+    if not isinstance(deliveries, list):
+        raise ValueError('DELIVERIES_MUST_BE_A_LIST')
+    if not isinstance(trains, list):
+        raise ValueError('TRAINS_MUST_BE_A_LIST')
+    if len(deliveries) == 0:
+        raise ValueError('NO_DELIVERIES_TO_BE_MADE')
+    if len(trains) == 0:
+        raise ValueError('NO_TRAIN_TO_DELIVER')
+
+    train_network, station_map = read_binary_train_network(network_prefix)
+    validate_manifest(station_map, deliveries, trains)
+    return train_network, station_map
+
+
+# plan deliveries on a network read from the binary format of src.network
+def route_binary_package_train(network_prefix, deliveries, trains):
+    train_network, station_map = load_binary_train_network(network_prefix, deliveries, trains)
+    shortest_paths = ShortestPathCache(len(station_map))
+
+    logs = plan_package_train(
+        deliveries,
+        trains,
+        train_network,
+        station_map,
+        shortest_paths
+    )
     print('Chronological train schedule')
     for log in logs:
         print(log)
+    return logs
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from src.routing import (
+    construct_train_network,
+    plan_package_train,
+    validate_manifest,
+    validate_network
+)
+from src.shortest_path import ShortestPathCache
+
+# network and shortest path cache of the current worker, built once by the pool
+# initializer and kept warm across every plan the worker runs
+_worker_state = dict()
+
+# a request is one line, asyncio's default 64 KiB line limit only fits about 2,000
+# deliveries
+DEFAULT_REQUEST_LIMIT = 64 * 1024 * 1024
+
+
+def initialise_worker(stations, routes):
+    train_network, station_map = construct_train_network(stations, routes)
+    _worker_state['train_network'] = train_network
+    _worker_state['station_map'] = station_map
+    _worker_state['shortest_paths'] = ShortestPathCache(len(station_map))
+
+
+def plan_in_worker(deliveries, trains):
+    validate_manifest(_worker_state['station_map'], deliveries, trains)
+    return plan_package_train(
+        deliveries,
+        trains,
+        _worker_state['train_network'],
+        _worker_state['station_map'],
+        _worker_state['shortest_paths']
+    )
+
+
+class RoutingService:
+
+    def __init__(
+        self,
+        stations,
+        routes,
+        workers=1,
+        executor=None,
+        request_limit=DEFAULT_REQUEST_LIMIT
+    ):
+        if not isinstance(stations, list) or len(stations) == 0:
+            raise ValueError('NO_STATION_DEFINED')
+        if not isinstance(routes, list) or len(routes) == 0:
+            raise ValueError('NO_ROUTE_DEFINED_BETWEEN_STATION')
+        self._stations = validate_network(stations, routes)
+        self._routes = routes
+        self._workers = workers
+        self._request_limit = request_limit
+        self._executor = executor
+        self._owns_executor = executor is None
+
+        self._fleet = None
+        # plans that are queued or running, identical submissions share one plan
+        self._pending = dict()
+        self._queue = None
+        self._dispatchers = list()
+        self._server = None
+
+    def fleet(self):
+        return self._fleet
+
+    async def start(self, path=None, host='127.0.0.1', port=None):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                initializer=initialise_worker,
+                initargs=(self._stations, self._routes)
+            )
+        self._queue = asyncio.Queue()
+        self._dispatchers = [
+            asyncio.ensure_future(self._dispatch()) for _i in range(self._workers)
+        ]
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection,
+                path=path,
+                limit=self._request_limit
+            )
+        elif port is not None:
+            self._server = await asyncio.start_server(
+                self._handle_connection,
+                host,
+                port,
+                limit=self._request_limit
+            )
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # clients waiting on a plan that will never run are answered first
+        for plan in self._pending.values():
+            if not plan.done():
+                plan.set_exception(ValueError('SERVICE_STOPPED'))
+        self._pending = dict()
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = list()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def handle_request(self, request):
+        try:
+            if not isinstance(request, dict):
+                raise ValueError('REQUEST_MUST_BE_AN_OBJECT')
+            request_type = request.get('type', None)
+            if request_type == 'fleet':
+                return self._submit_fleet(request.get('trains', None))
+            if request_type == 'deliveries':
+                logs = await self._submit_deliveries(
+                    request.get('deliveries', None),
+                    request.get('trains', self._fleet)
+                )
+                return {'status': 'OK', 'logs': logs}
+            raise ValueError('UNKNOWN_REQUEST_TYPE')
+        except ValueError as e:
+            return {'status': 'ERROR', 'error': str(e)}
+        except TypeError as _e:
+            # e.g. a train or a delivery that is not a list
+            return {'status': 'ERROR', 'error': 'MALFORMED_REQUEST'}
+
+    def _submit_fleet(self, trains):
+        if not isinstance(trains, list) or len(trains) == 0:
+            raise ValueError('NO_TRAIN_TO_DELIVER')
+        validate_manifest(set(self._stations), [], trains)
+        self._fleet = trains
+        return {'status': 'OK', 'trains': len(trains)}
+
+    async def _submit_deliveries(self, deliveries, trains):
+        if not isinstance(deliveries, list) or len(deliveries) == 0:
+            raise ValueError('NO_DELIVERIES_TO_BE_MADE')
+        if not isinstance(trains, list) or len(trains) == 0:
+            raise ValueError('NO_TRAIN_TO_DELIVER')
+
+        key = json.dumps([deliveries, trains], sort_keys=True)
+        plan = self._pending.get(key, None)
+        if plan is None:
+            plan = asyncio.get_running_loop().create_future()
+            self._pending[key] = plan
+            await self._queue.put((key, deliveries, trains, plan))
+        return await asyncio.shield(plan)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, deliveries, trains, plan = await self._queue.get()
+            try:
+                logs = await loop.run_in_executor(
+                    self._executor,
+                    plan_in_worker,
+                    deliveries,
+                    trains
+                )
+                if not plan.done():
+                    plan.set_result(logs)
+            except Exception as e:
+                if not plan.done():
+                    plan.set_exception(e if isinstance(e, ValueError) else ValueError(str(e)))
+            finally:
+                self._pending.pop(key, None)
+                self._queue.task_done()
+
+    # a line longer than the request limit is read to its end and dropped, so the
+    # next request on the connection still starts on a line of its own
+    async def _read_request(self, reader):
+        too_large = False
+        while True:
+            try:
+                line = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                too_large = True
+                await reader.readexactly(e.consumed)
+                continue
+            if too_large:
+                return None, True
+            return line, False
+
+    # one JSON request per line, answered with one JSON response per line
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                line, too_large = await self._read_request(reader)
+                if not line and not too_large:
+                    break
+                if too_large:
+                    response = {'status': 'ERROR', 'error': 'REQUEST_TOO_LARGE'}
+                else:
+                    try:
+                        request = json.loads(line)
+                    except json.JSONDecodeError as _e:
+                        response = {'status': 'ERROR', 'error': 'INVALID_JSON'}
+                    else:
+                        response = await self.handle_request(request)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(
+    stations,
+    routes,
+    path=None,
+    host='127.0.0.1',
+    port=None,
+    workers=1,
+    request_limit=DEFAULT_REQUEST_LIMIT
+):
+    service = RoutingService(stations, routes, workers=workers, request_limit=request_limit)
+    server = await service.start(path=path, host=host, port=port)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Resident mail train routing service')
+    parser.add_argument('network', help='JSON file with "stations" and "routes"')
+    parser.add_argument('--socket', help='unix socket path to listen on')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--request-limit', type=int, default=DEFAULT_REQUEST_LIMIT,
+                        help='longest request line accepted, in bytes')
+    arguments = parser.parse_args()
+    if arguments.socket is None and arguments.port is None:
+        parser.error('one of --socket or --port is required')
+
+    with open(arguments.network) as network_file:
+        network = json.load(network_file)
+    asyncio.run(serve(
+        network['stations'],
+        network['routes'],
+        path=arguments.socket,
+        host=arguments.host,
+        port=arguments.port,
+        workers=arguments.workers,
+        request_limit=arguments.request_limit
+    ))
@@ -0,0 +1,103 @@
+class ShortestPathCache:
+
+    # each source station owns a shortest path tree made of a predecessor array and
+    # a distance array, paths are rebuilt on demand by following the predecessors
+    # so the cache grows with the number of sources times the number of stations
+    def __init__(self, no_of_station):
+        self._no_of_station = no_of_station
+        self._predecessors = dict()
+        self._distances = dict()
+        # sources whose tree covers every reachable station
+        self._complete = set()
+        self._hits = 0
+        self._misses = 0
+
+    def no_of_station(self):
+        return self._no_of_station
+
+    def sources(self):
+        return list(self._distances.keys())
+
+    def distance(self, source, target):
+        distances = self._distances.get(source, None)
+        if distances is not None and distances[target] is not None:
+            return distances[target]
+        # the network is undirected, so the tree of the target also serves the query
+        distances = self._distances.get(target, None)
+        if distances is not None and distances[source] is not None:
+            return distances[source]
+        return None
+
+    def path(self, source, target):
+        distances = self._distances.get(source, None)
+        if distances is not None and distances[target] is not None:
+            path = self._trace(source, target)
+            path.reverse()
+            return path
+        distances = self._distances.get(target, None)
+        if distances is not None and distances[source] is not None:
+            return self._trace(target, source)
+        return None
+
+    def get(self, source, target):
+        time_cost = self.get_distance(source, target)
+        if time_cost is None:
+            return None, None
+        return time_cost, self.path(source, target)
+
+    # a counted lookup that leaves the path in the tree, for callers that only
+    # compare costs
+    def get_distance(self, source, target):
+        time_cost = self.distance(source, target)
+        if time_cost is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return time_cost
+
+    def statistics(self):
+        lookups = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups > 0 else 0
+        }
+
+    # path_costs holds the cumulative time cost to every station on the path,
+    # without it only the distance of the target is known
+    def set(self, source, target, time_cost, path, path_costs=None):
+        if source in self._complete:
+            return
+        predecessors, distances = self._tree(source)
+        # a sub path of a shortest path is itself a shortest path, so overwriting the
+        # predecessors along the path keeps every branch of the tree a shortest path
+        for index in range(1, len(path)):
+            predecessors[path[index]] = path[index - 1]
+            if path_costs is not None:
+                distances[path[index]] = path_costs[index]
+        distances[target] = time_cost
+
+    def set_tree(self, source, distances, predecessors):
+        self._distances[source] = distances
+        self._predecessors[source] = predecessors
+        self._complete.add(source)
+
+    def has_tree(self, source):
+        return source in self._complete
+
+    def _tree(self, source):
+        if source not in self._distances:
+            self._predecessors[source] = [None] * self._no_of_station
+            self._distances[source] = [None] * self._no_of_station
+            self._distances[source][source] = 0
+        return self._predecessors[source], self._distances[source]
+
+    # walk from the target back to the source, the result is in reverse order
+    def _trace(self, source, target):
+        predecessors = self._predecessors[source]
+        path = [target]
+        station = target
+        while station != source:
+            station = predecessors[station]
+            path.append(station)
+        return path
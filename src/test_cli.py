@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+from src.cli import main
+from src.network import write_binary_train_network
+from src.routing import route_package_train
+
+
+def write_input(path, stations, routes, deliveries, trains):
+    path.write_text(json.dumps({
+        'stations': stations,
+        'routes': routes,
+        'deliveries': deliveries,
+        'trains': trains
+    }))
+
+
+def read_schedule(path):
+    with open(path) as schedule_file:
+        return [json.loads(line) for line in schedule_file]
+
+
+def test_cli_plans_json_input(tmp_path, hitchhike_scenario):
+    input_path = tmp_path / 'plan.json'
+    write_input(input_path, *hitchhike_scenario())
+    output_path = str(tmp_path / 'schedule.jsonl')
+    chrome_trace_path = str(tmp_path / 'plan.json.trace')
+
+    assert main([str(input_path), '--output', output_path, '--chrome-trace', chrome_trace_path]) == 0
+    expected_logs = route_package_train(*hitchhike_scenario())
+    assert read_schedule(output_path) == json.loads(json.dumps(expected_logs))
+    with open(chrome_trace_path) as trace_file:
+        assert len(json.load(trace_file)['traceEvents']) > 0
+
+    # the networkx backend plans the same schedule
+    networkx_output_path = str(tmp_path / 'networkx.jsonl')
+    assert main([str(input_path), '--backend', 'networkx', '--output', networkx_output_path]) == 0
+    assert read_schedule(networkx_output_path) == read_schedule(output_path)
+
+
+def test_cli_plans_binary_network(tmp_path, hitchhike_scenario):
+    stations, routes, deliveries, trains = hitchhike_scenario()
+    prefix = str(tmp_path / 'network')
+    write_binary_train_network(prefix, stations, routes)
+    input_path = tmp_path / 'manifest.json'
+    input_path.write_text(json.dumps({'deliveries': deliveries, 'trains': trains}))
+    output_path = str(tmp_path / 'schedule.jsonl')
+
+    assert main([str(input_path), '--binary-network', prefix, '--output', output_path]) == 0
+    assert read_schedule(output_path)[-1]['time'] > 0
+
+
+def test_cli_reports_invalid_input(tmp_path, capsys, hitchhike_scenario):
+    stations, routes, _deliveries, trains = hitchhike_scenario()
+    input_path = tmp_path / 'plan.json'
+    write_input(input_path, stations, routes, [('P1', 'A', 'Z', 1)], trains)
+    assert main([str(input_path)]) == 1
+    assert 'MISSING_STATION_IN_STATIONS' in capsys.readouterr().err
+
+    write_input(input_path, stations, routes, [('P1', 'A', 'B', None)], trains)
+    assert main([str(input_path)]) == 1
+    assert 'MALFORMED_INPUT' in capsys.readouterr().err
+
+    input_path.write_text('{"stations": ')
+    assert main([str(input_path)]) == 1
+    assert 'INVALID_JSON' in capsys.readouterr().err
+
+    assert main([str(tmp_path / 'missing.json')]) == 1
+    assert 'FILE_NOT_FOUND' in capsys.readouterr().err
+
+    write_input(input_path, *hitchhike_scenario())
+    missing_prefix = str(tmp_path / 'missing')
+    assert main([str(input_path), '--binary-network', missing_prefix]) == 1
+    assert 'FILE_NOT_FOUND' in capsys.readouterr().err
+
+    assert main([str(input_path), '--trace', str(tmp_path / 'missing' / 'plan.trace')]) == 1
+    assert 'FILE_NOT_FOUND' in capsys.readouterr().err
+
+
+def test_routing_import_does_not_load_networkx():
+    modules = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'import sys, src.cli; print(" ".join(sys.modules))'
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout.split()
+    assert 'src.routing' in modules
+    assert 'networkx' not in modules
+    assert 'multiprocessing.shared_memory' not in modules
@@ -0,0 +1,116 @@
+import itertools
+import random
+import networkx as nx
+import pytest
+from src.network import (
+    NAME_HEADER,
+    label_components,
+    read_binary_train_network,
+    write_binary_train_network
+)
+from src.routing import (
+    construct_train_network,
+    route_binary_package_train,
+    search_shortest_path
+)
+
+STATIONS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'J', 'L', 'M', 'N']
+ROUTES = [
+    ('E1', 'A', 'B', 1),
+    ('E2', 'A', 'C', 1),
+    ('E3', 'A', 'G', 2),
+    ('E4', 'B', 'C', 1),
+    ('E5', 'B', 'D', 2),
+    ('E6', 'C', 'E', 3),
+    ('E7', 'C', 'D', 2),
+    ('E8', 'D', 'E', 4),
+    ('E9', 'E', 'F', 2),
+    ('E10', 'F', 'H', 100),
+    ('E11', 'F', 'J', 4),
+    ('E12', 'H', 'L', 5),
+    ('E13', 'L', 'M', 2),
+]
+
+
+def test_binary_network_round_trip(tmp_path):
+    prefix = str(tmp_path / 'network')
+    write_binary_train_network(prefix, STATIONS, ROUTES)
+    train_network, station_map = read_binary_train_network(prefix)
+    graph, graph_station_map = construct_train_network(STATIONS, ROUTES, backend='networkx')
+
+    assert station_map == graph_station_map
+    assert train_network.route_name(station_map['F'], station_map['H']) == 'E10'
+    assert train_network.route_time_cost(station_map['H'], station_map['F']) == 100
+    for left_node, right_node in itertools.product(range(len(STATIONS)), repeat=2):
+        time_cost, path = search_shortest_path(left_node, right_node, train_network)
+        expected_cost, _ = search_shortest_path(left_node, right_node, graph)
+        assert time_cost == expected_cost
+        if time_cost is not None:
+            assert path[0] == left_node and path[-1] == right_node
+            assert sum(
+                train_network.route_time_cost(path[i], path[i + 1])
+                for i in range(len(path) - 1)
+            ) == time_cost
+
+
+def test_binary_network_routing(tmp_path):
+    prefix = str(tmp_path / 'network')
+    write_binary_train_network(prefix, STATIONS, ROUTES)
+    deliveries = [
+        ('P1', 'A', 'C', 1),
+        ('P2', 'G', 'D', 3),
+        ('P4', 'A', 'L', 20),
+        ('P9', 'H', 'M', 2)
+    ]
+    trains = [
+        ('Q1', 'G', 3),
+        ('Q2', 'D', 100)
+    ]
+    logs = route_binary_package_train(prefix, deliveries, trains)
+    delivered = [name for log in logs for name in log['dropped_packages']]
+    assert set(delivered) >= {'P1', 'P2', 'P4', 'P9'}
+
+
+def test_invalid_binary_network(tmp_path):
+    prefix = str(tmp_path / 'network')
+    write_binary_train_network(prefix, STATIONS, ROUTES)
+    with open(prefix + '.edges', 'r+b') as edge_file:
+        edge_file.write(b'XXXX')
+    with pytest.raises(ValueError):
+        read_binary_train_network(prefix)
+
+
+def test_corrupted_binary_network_names(tmp_path):
+    prefix = str(tmp_path / 'network')
+    write_binary_train_network(prefix, STATIONS, ROUTES)
+    with open(prefix + '.names', 'rb') as name_file:
+        names = name_file.read()
+
+    # the offset of the second name points past the end of the third
+    corrupted = bytearray(names)
+    corrupted[NAME_HEADER.itemsize + 8:NAME_HEADER.itemsize + 16] = (100).to_bytes(8, 'little')
+    with open(prefix + '.names', 'wb') as name_file:
+        name_file.write(corrupted)
+    with pytest.raises(ValueError, match='INVALID_NETWORK_FILE'):
+        read_binary_train_network(prefix)
+
+    for length in (NAME_HEADER.itemsize + 20, len(names) - 1):
+        with open(prefix + '.names', 'wb') as name_file:
+            name_file.write(names[:length])
+        with pytest.raises(ValueError, match='INVALID_NETWORK_FILE'):
+            read_binary_train_network(prefix)
+
+
+def test_label_components():
+    rng = random.Random(1)
+    no_of_station = 200
+    left = [rng.randrange(no_of_station) for _i in range(150)]
+    right = [rng.randrange(no_of_station) for _i in range(150)]
+    labels = label_components(no_of_station, left, right)
+
+    graph = nx.Graph()
+    graph.add_nodes_from(range(no_of_station))
+    graph.add_edges_from(zip(left, right))
+    for component in nx.connected_components(graph):
+        assert len({labels[station] for station in component}) == 1
+    assert len(set(labels.tolist())) == nx.number_connected_components(graph)
@@ -0,0 +1,44 @@
+import pytest
+from src.generators import generate_grid_network
+from src.parallel import SharedShortestPathIndex
+from src.routing import construct_train_network, route_package_train, search_shortest_path
+from src.shortest_path import ShortestPathCache
+
+
+def test_shared_index_trees():
+    stations, routes = generate_grid_network(8, 8)
+    stations.append('ISLAND')
+    train_network, station_map = construct_train_network(stations, routes)
+    shortest_paths = ShortestPathCache(len(station_map))
+    sources = [0, 9, 27, 63]
+
+    shared_index = SharedShortestPathIndex(train_network, 2, batch_size=4)
+    try:
+        shared_index.compute(sources, shortest_paths)
+    finally:
+        shared_index.close()
+
+    for source in sources:
+        assert shortest_paths.has_tree(source)
+        for target in range(len(station_map)):
+            time_cost, path = shortest_paths.get(source, target)
+            expected_cost, _ = search_shortest_path(source, target, train_network)
+            assert time_cost == expected_cost
+            if time_cost is not None:
+                assert path[0] == source and path[-1] == target
+
+
+def test_batch_size_must_be_positive():
+    stations, routes = generate_grid_network(3, 3)
+    train_network, _station_map = construct_train_network(stations, routes)
+    with pytest.raises(ValueError, match='BATCH_SIZE_MUST_BE_BIGGER_THAN_ZERO'):
+        SharedShortestPathIndex(train_network, 2, 0)
+    with pytest.raises(ValueError, match='BATCH_SIZE_MUST_BE_BIGGER_THAN_ZERO'):
+        route_package_train(
+            stations,
+            routes,
+            [('P1', 'S0_0', 'S2_2', 1)],
+            [('Q1', 'S1_1', 5)],
+            processes=2,
+            batch_size=0
+        )
@@ -0,0 +1,42 @@
+from src.relay import Timetable
+from src.train import Train
+
+
+def test_earliest_arrival_with_transfer():
+    first_train = Train('Q1', 0, 5)
+    second_train = Train('Q2', 1, 5)
+    timetable = Timetable()
+    timetable.add_leg(first_train, 0, 0, 1, 3, 0, 0)
+    timetable.add_leg(first_train, 1, 3, 4, 10, 0, 1)
+    timetable.add_leg(second_train, 1, 4, 2, 5, 4, 0)
+    timetable.add_leg(second_train, 2, 5, 3, 6, 0, 1)
+
+    arrival_time, rides = timetable.earliest_arrival(0, 3, 0, 1)
+    assert arrival_time == 6
+    assert rides == [(first_train, 0, 0), (second_train, 0, 1)]
+
+    # the leg from 1 to 2 is too full for a heavier package
+    assert timetable.earliest_arrival(0, 3, 0, 2) == (None, None)
+    # no transfer allowed
+    assert timetable.earliest_arrival(0, 3, 0, 1, max_transfers=0) == (None, None)
+    # the relay must beat the deadline
+    assert timetable.earliest_arrival(0, 3, 0, 1, deadline=6) == (None, None)
+
+    timetable.reserve(rides, 1)
+    assert timetable.legs(second_train)[0]['load'] == 5
+
+
+def test_earliest_arrival_keeps_fewer_rides():
+    trains = [Train('Q{}'.format(index), 0, 5) for index in range(1, 5)]
+    timetable = Timetable()
+    # stations O, Y, X and D are 0, 1, 2 and 3, X is reached first through Y with
+    # two rides and later directly with one
+    timetable.add_leg(trains[0], 0, 0, 1, 1, 0, 0)
+    timetable.add_leg(trains[1], 1, 1, 2, 2, 0, 0)
+    timetable.add_leg(trains[2], 0, 0, 2, 3, 0, 0)
+    timetable.add_leg(trains[3], 2, 5, 3, 6, 0, 0)
+
+    arrival_time, rides = timetable.earliest_arrival(0, 3, 0, 1, max_transfers=1)
+    assert arrival_time == 6
+    assert rides == [(trains[2], 0, 0), (trains[3], 0, 0)]
+    assert timetable.earliest_arrival(0, 3, 0, 1, max_transfers=0) == (None, None)
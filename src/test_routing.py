@@ -1,5 +1,12 @@
 import pytest
-from src.routing import route_package_train
+import src.routing as routing
+from src.generators import generate_grid_network, generate_manifest
+from src.routing import (
+    route_package_train,
+    construct_train_network,
+    compute_shortest_path
+)
+from src.shortest_path import ShortestPathCache
 
 
 def test_invalid_input_dictionary():
@@ -295,6 +302,285 @@ def test_10_node_graph():
     route_package_train(stations, routes, deliveries, trains)
 
 
+def test_shortest_path_cost_and_path():
+    stations = ['A', 'B', 'C', 'D']
+    routes = [
+        ('E1', 'A', 'B', 1),
+        ('E2', 'B', 'C', 1),
+        ('E3', 'A', 'C', 5),
+        ('E4', 'C', 'D', 2)
+    ]
+    train_network, station_map = construct_train_network(stations, routes)
+    shortest_paths = ShortestPathCache(len(stations))
+    time_cost, path = compute_shortest_path(0, 3, shortest_paths, train_network)
+    assert time_cost == 4
+    assert path == [0, 1, 2, 3]
+    # the reverse direction is served from the cache
+    assert compute_shortest_path(3, 0, shortest_paths, train_network) == (4, [3, 2, 1, 0])
+
+
+def test_shortest_path_cache_tree():
+    shortest_paths = ShortestPathCache(5)
+    shortest_paths.set(0, 3, 6, [0, 1, 2, 3], [0, 1, 4, 6])
+    # stations on a stored path are answered from the same tree in both directions
+    assert shortest_paths.get(0, 2) == (4, [0, 1, 2])
+    assert shortest_paths.get(2, 0) == (4, [2, 1, 0])
+    shortest_paths.set(0, 4, 7, [0, 1, 4], [0, 1, 7])
+    assert shortest_paths.get(4, 0) == (7, [4, 1, 0])
+    assert shortest_paths.get(1, 3) == (None, None)
+    assert shortest_paths.sources() == [0]
+
+
+def test_undeliverable_package_rejected_upfront():
+    stations = ['A', 'B', 'C', 'D']
+    routes = [
+        ('E1', 'A', 'B', 1),
+        ('E2', 'C', 'D', 1)
+    ]
+    trains = [
+        ('Q1', 'A', 6),
+        ('Q2', 'C', 2)
+    ]
+    with pytest.raises(ValueError, match='NO_PATH_TO_DELIVER_PACKAGE'):
+        route_package_train(
+            list(stations),
+            list(routes),
+            [('P1', 'A', 'B', 1), ('P2', 'A', 'D', 1)],
+            list(trains)
+        )
+    with pytest.raises(ValueError, match='PACKAGE_CANNOT_BE_DELIVERED_BY_ANY_TRAIN'):
+        route_package_train(
+            list(stations),
+            list(routes),
+            [('P1', 'A', 'B', 1), ('P2', 'C', 'D', 3)],
+            list(trains)
+        )
+
+
+def ten_node_scenario():
+    stations = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'J', 'L', 'M']
+    routes = [
+        ('E1', 'A', 'B', 1),
+        ('E2', 'A', 'C', 1),
+        ('E3', 'A', 'G', 2),
+        ('E4', 'B', 'C', 1),
+        ('E5', 'B', 'D', 2),
+        ('E6', 'C', 'E', 3),
+        ('E7', 'C', 'D', 2),
+        ('E8', 'D', 'E', 4),
+        ('E9', 'E', 'F', 2),
+        ('E10', 'F', 'H', 100),
+        ('E11', 'F', 'J', 4),
+        ('E12', 'H', 'L', 5),
+        ('E13', 'L', 'M', 2),
+    ]
+    deliveries = [
+        ('P1', 'A', 'C', 1),
+        ('P2', 'G', 'D', 3),
+        ('P3', 'G', 'E', 10),
+        ('P4', 'A', 'L', 20),
+        ('P5', 'C', 'G', 6),
+        ('P6', 'C', 'B', 1),
+        ('P7', 'F', 'B', 1),
+        ('P8', 'L', 'M', 1),
+        ('P9', 'H', 'M', 2),
+        ('P10', 'C', 'J', 4)
+    ]
+    trains = [
+        ('Q1', 'G', 3),
+        ('Q2', 'D', 100),
+        ('Q3', 'C', 5),
+        ('Q4', 'J', 7),
+        ('Q5', 'J', 3),
+        ('Q6', 'J', 5),
+    ]
+    return stations, routes, deliveries, trains
+
+
+def test_checkpoint_resume(tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / 'plan.checkpoint')
+    expected_logs = route_package_train(*ten_node_scenario())
+
+    find_best_delivery_train = routing.find_best_delivery_train
+    calls = list()
+
+    def failing_find_best_delivery_train(*arguments):
+        calls.append(arguments[0].name())
+        if len(calls) == 4:
+            raise ValueError('PACKAGE_CANNOT_BE_DELIVERED_BY_ANY_TRAIN')
+        return find_best_delivery_train(*arguments)
+
+    monkeypatch.setattr(routing, 'find_best_delivery_train', failing_find_best_delivery_train)
+    with pytest.raises(ValueError):
+        route_package_train(
+            *ten_node_scenario(),
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=0,
+            checkpoint_cache=True
+        )
+    logs = route_package_train(
+        *ten_node_scenario(),
+        checkpoint_path=checkpoint_path,
+        checkpoint_cache=True,
+        resume=True
+    )
+    # the resumed run continues from the package that failed
+    assert calls[4] == calls[3]
+    assert logs == expected_logs
+    assert not (tmp_path / 'plan.checkpoint').exists()
+
+
+def test_checkpoint_rejects_changed_input(tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / 'plan.checkpoint')
+
+    def failing_find_best_delivery_train(*arguments):
+        raise ValueError('PACKAGE_CANNOT_BE_DELIVERED_BY_ANY_TRAIN')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(routing, 'find_best_delivery_train', failing_find_best_delivery_train)
+        with pytest.raises(ValueError):
+            route_package_train(
+                *ten_node_scenario(),
+                checkpoint_path=checkpoint_path,
+                checkpoint_interval=0
+            )
+
+    stations, routes, deliveries, trains = ten_node_scenario()
+    routes[0] = (routes[0][0], routes[0][1], routes[0][2], routes[0][3] + 1)
+    with pytest.raises(ValueError, match='CHECKPOINT_DOES_NOT_MATCH_INPUT'):
+        route_package_train(
+            stations,
+            routes,
+            deliveries,
+            trains,
+            checkpoint_path=checkpoint_path,
+            resume=True
+        )
+    with pytest.raises(ValueError, match='CHECKPOINT_DOES_NOT_MATCH_INPUT'):
+        route_package_train(
+            *ten_node_scenario(),
+            relay=True,
+            checkpoint_path=checkpoint_path,
+            resume=True
+        )
+
+
+@pytest.mark.parametrize('ordering', [
+    'manifest',
+    'origin',
+    'nearest_train',
+    'weight',
+    'space_filling'
+])
+def test_package_ordering(ordering):
+    stations, routes, deliveries, trains = ten_node_scenario()
+    logs = route_package_train(stations, routes, deliveries, trains, ordering=ordering)
+    delivered = {
+        name for log in logs for name in log['dropped_packages']
+        if any(name == delivery[0] and log['station'] == delivery[2] for delivery in deliveries)
+    }
+    assert delivered == {delivery[0] for delivery in deliveries}
+
+
+def test_unknown_package_ordering():
+    with pytest.raises(ValueError, match='UNKNOWN_PACKAGE_ORDERING'):
+        route_package_train(*ten_node_scenario(), ordering='random')
+
+
+def assert_valid_schedule(logs, deliveries, trains):
+    weights = {delivery[0]: delivery[3] for delivery in deliveries}
+    capacities = {train[0]: train[2] for train in trains}
+    loads = {train[0]: 0 for train in trains}
+    delivered = set()
+    for log in logs:
+        for name in log['dropped_packages']:
+            loads[log['train']] -= weights[name]
+            if any(name == delivery[0] and log['station'] == delivery[2] for delivery in deliveries):
+                delivered.add(name)
+        for name in log['loaded_packages']:
+            loads[log['train']] += weights[name]
+        assert loads[log['train']] <= capacities[log['train']]
+    assert delivered == {delivery[0] for delivery in deliveries if delivery[1] != delivery[2]}
+
+
+def test_insertion_planner():
+    stations, routes, deliveries, trains = ten_node_scenario()
+    logs = route_package_train(stations, routes, deliveries, trains, planner='insertion')
+    assert_valid_schedule(logs, deliveries, trains)
+
+
+def test_insertion_planner_shares_tour():
+    stations = ['A', 'B', 'C', 'D']
+    routes = [
+        ('E1', 'A', 'B', 1),
+        ('E2', 'B', 'C', 1),
+        ('E3', 'C', 'D', 1)
+    ]
+    deliveries = [
+        ('P1', 'A', 'D', 2),
+        ('P2', 'B', 'C', 2),
+        ('P3', 'C', 'D', 2)
+    ]
+    trains = [
+        ('Q1', 'A', 4)
+    ]
+    logs = route_package_train(stations, routes, deliveries, trains, planner='insertion')
+    assert_valid_schedule(logs, deliveries, trains)
+    # all three packages are carried on a single pass along the line
+    assert max(log['time'] for log in logs) == 3
+
+
+def test_relay_planner():
+    stations, routes, deliveries, trains = ten_node_scenario()
+    logs = route_package_train(stations, routes, deliveries, trains, relay=True)
+    assert_valid_schedule(logs, deliveries, trains)
+
+
+def test_relay_through_moving_trains():
+    stations = ['A', 'B', 'C', 'D', 'E']
+    routes = [
+        ('E0', 'A', 'B', 2),
+        ('E1', 'B', 'C', 4),
+        ('E2', 'C', 'D', 2),
+        ('E3', 'D', 'E', 1),
+        ('E9', 'A', 'E', 6)
+    ]
+    deliveries = [
+        ('P0', 'A', 'B', 1),
+        ('P1', 'A', 'D', 1),
+        ('P2', 'B', 'D', 1)
+    ]
+    trains = [
+        ('Q0', 'C', 3),
+        ('Q1', 'E', 3)
+    ]
+    logs = route_package_train(stations, routes, deliveries, trains, relay=True)
+    assert_valid_schedule(logs, deliveries, trains)
+    # P2 rides Q0 on its way to pick up P0 and changes to Q1 at A
+    carriers = {log['train'] for log in logs if 'P2' in log['loaded_packages']}
+    assert carriers == {'Q0', 'Q1'}
+    assert max(log['time'] for log in logs) == 13
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'relay': True},
+    {'planner': 'insertion'},
+    {'processes': 2, 'batch_size': 16}
+])
+def test_generated_schedule_within_capacity(options):
+    stations, routes = generate_grid_network(12, 12)
+    deliveries, trains = generate_manifest(stations, 80, 6)
+    logs = route_package_train(
+        list(stations),
+        list(routes),
+        list(deliveries),
+        list(trains),
+        **options
+    )
+    assert_valid_schedule(logs, deliveries, trains)
+
+
 if __name__ == '__main__':
     # test_ground_scenario()
     # test_inventory()
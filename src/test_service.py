@@ -0,0 +1,114 @@
+import asyncio
+import json
+from concurrent.futures import Executor, Future
+from src.service import RoutingService
+
+
+def ground_network():
+    stations = ['A', 'B', 'C']
+    routes = [
+        ('E1', 'A', 'B', 3),
+        ('E2', 'B', 'C', 1)
+    ]
+    return stations, routes
+
+
+async def send_requests(path, requests):
+    reader, writer = await asyncio.open_unix_connection(path)
+    responses = list()
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b'\n')
+        await writer.drain()
+        responses.append(json.loads(await reader.readline()))
+    writer.close()
+    return responses
+
+
+def test_service_plans_against_warm_fleet(tmp_path):
+    path = str(tmp_path / 'routing.sock')
+
+    async def scenario():
+        service = RoutingService(*ground_network(), workers=1)
+        await service.start(path=path)
+        try:
+            malformed, fleet, plan, invalid = await send_requests(path, [
+                {'type': 'fleet', 'trains': [1]},
+                {'type': 'fleet', 'trains': [['Q1', 'B', 6], ['Q2', 'C', 5]]},
+                {'type': 'deliveries', 'deliveries': [['P1', 'A', 'C', 5], ['P2', 'B', 'C', 3]]},
+                {'type': 'deliveries', 'deliveries': [['P1', 'A', 'Z', 5]]}
+            ])
+            # concurrent identical submissions are coalesced into a single plan
+            coalesced = await asyncio.gather(*[
+                service.handle_request({
+                    'type': 'deliveries',
+                    'deliveries': [['P1', 'A', 'C', 5]]
+                }) for _i in range(3)
+            ])
+        finally:
+            await service.stop()
+        return malformed, fleet, plan, invalid, coalesced
+
+    malformed, fleet, plan, invalid, coalesced = asyncio.run(scenario())
+    assert malformed == {'status': 'ERROR', 'error': 'MALFORMED_REQUEST'}
+    assert fleet == {'status': 'OK', 'trains': 2}
+    assert plan['status'] == 'OK'
+    delivered = [name for log in plan['logs'] for name in log['dropped_packages']]
+    assert sorted(delivered) == ['P1', 'P2']
+    assert invalid == {'status': 'ERROR', 'error': 'MISSING_STATION_IN_STATIONS'}
+    assert all(response == coalesced[0] for response in coalesced)
+
+
+# an executor whose plans never finish
+class StalledExecutor(Executor):
+
+    def submit(self, function, *arguments, **keywords):
+        return Future()
+
+
+def test_service_stop_answers_pending_plans():
+
+    async def scenario():
+        service = RoutingService(*ground_network(), executor=StalledExecutor())
+        await service.start()
+        request = asyncio.ensure_future(service.handle_request({
+            'type': 'deliveries',
+            'deliveries': [['P1', 'A', 'C', 5]],
+            'trains': [['Q1', 'B', 6]]
+        }))
+        await asyncio.sleep(0.01)
+        await service.stop()
+        return await asyncio.wait_for(request, 1)
+
+    assert asyncio.run(scenario()) == {'status': 'ERROR', 'error': 'SERVICE_STOPPED'}
+
+
+def test_service_answers_large_requests(tmp_path):
+    path = str(tmp_path / 'routing.sock')
+    small_path = str(tmp_path / 'small.sock')
+    # over 64 KiB on one line, the last delivery names an unknown station
+    deliveries = [['P{}'.format(index), 'A', 'C', 1] for index in range(3000)]
+    deliveries.append(['P3000', 'A', 'Z', 1])
+    large_request = {'type': 'deliveries', 'deliveries': deliveries, 'trains': [['Q1', 'B', 6]]}
+    assert len(json.dumps(large_request)) > 64 * 1024
+
+    async def scenario():
+        service = RoutingService(*ground_network(), workers=1)
+        small_service = RoutingService(*ground_network(), workers=1, request_limit=1024)
+        await service.start(path=path)
+        await small_service.start(path=small_path)
+        try:
+            large = await send_requests(path, [large_request])
+            too_large, fleet = await send_requests(small_path, [
+                large_request,
+                {'type': 'fleet', 'trains': [['Q1', 'B', 6]]}
+            ])
+        finally:
+            await service.stop()
+            await small_service.stop()
+        return large, too_large, fleet
+
+    large, too_large, fleet = asyncio.run(scenario())
+    assert large == [{'status': 'ERROR', 'error': 'MISSING_STATION_IN_STATIONS'}]
+    assert too_large == {'status': 'ERROR', 'error': 'REQUEST_TOO_LARGE'}
+    # the connection carries on with the next request
+    assert fleet == {'status': 'OK', 'trains': 1}
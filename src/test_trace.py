@@ -0,0 +1,50 @@
+import json
+import pytest
+from src.routing import route_package_train
+from src.trace import DecisionTrace, export_chrome_trace, read_trace_file
+
+
+def test_decision_trace(tmp_path, hitchhike_scenario):
+    trace_path = str(tmp_path / 'plan.trace')
+    trace = DecisionTrace(capacity=1000, path=trace_path)
+    logs = route_package_train(*hitchhike_scenario(), trace=trace)
+    trace.close()
+
+    decisions = trace.decisions()
+    assert decisions == read_trace_file(trace_path)
+
+    # a trace cut short in the middle of a record is rejected
+    truncated_path = tmp_path / 'truncated.trace'
+    with open(trace_path, 'rb') as trace_file:
+        truncated_path.write_bytes(trace_file.read()[:-3])
+    with pytest.raises(ValueError, match='INVALID_TRACE_FILE'):
+        read_trace_file(str(truncated_path))
+    assigned = {
+        decision['package']: decision['train']
+        for decision in decisions if decision['decision'] == 'assign'
+    }
+    assert assigned == {'P1': 'Q1', 'P2': 'Q1', 'P3': 'Q2'}
+    assert {
+        'decision': 'candidate',
+        'package': 'P3',
+        'train': 'Q1',
+        'station': None,
+        'cost': None,
+        'elapsed_time': None,
+        'reason': 'capacity'
+    } in decisions
+    hitchhikes = [decision for decision in decisions if decision['decision'] == 'hitchhike']
+    assert [(decision['package'], decision['station']) for decision in hitchhikes] == [('P2', 'A')]
+
+    chrome_trace_path = tmp_path / 'plan.json'
+    export_chrome_trace(str(chrome_trace_path), logs, decisions)
+    events = json.loads(chrome_trace_path.read_text())['traceEvents']
+    assert sum(1 for event in events if event['ph'] == 'X') == \
+        sum(1 for log in logs if log['next_station'] is not None)
+
+
+def test_decision_trace_ring_buffer(hitchhike_scenario):
+    trace = DecisionTrace(capacity=3)
+    logs = route_package_train(*hitchhike_scenario(), trace=trace)
+    assert len(logs) > 0
+    assert len(trace.decisions()) == 3
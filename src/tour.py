@@ -0,0 +1,123 @@
+import math
+
+
+class Tour:
+
+    # an ordered list of stops a train will make from its initial station, each stop
+    # either picks up (positive weight) or drops (negative weight) one package
+    def __init__(self, station, max_capacity):
+        self._station = station
+        self._max_capacity = max_capacity
+        self._stops = list()
+        # time cost of the leg arriving at each stop and the load carried after it
+        self._leg_costs = list()
+        self._loads = list()
+
+    def stops(self):
+        return self._stops
+
+    def duration(self):
+        return sum(self._leg_costs)
+
+    def _stop_station(self, position):
+        if position == 0:
+            return self._station
+        return self._stops[position - 1][0]
+
+    def _load_after(self, position):
+        if position == 0:
+            return 0
+        return self._loads[position - 1]
+
+    # cheapest insertion of a pickup at origin and a drop at destination, the pickup
+    # goes after stop i and the drop after stop j (i <= j, stop 0 being the initial
+    # station) so the package is carried on every leg from stop i to stop j
+    # distance_from_origin and distance_from_destination give the time cost between
+    # any station and the origin or the destination respectively
+    # returns the added time cost and the two positions, or None if infeasible
+    def best_insertion(
+        self,
+        origin,
+        destination,
+        weight,
+        distance_from_origin,
+        distance_from_destination
+    ):
+        no_of_stop = len(self._stops)
+        best = None
+        origin_to_destination = distance_from_origin(destination)
+        for i in range(no_of_stop + 1):
+            max_load = self._load_after(i)
+            if max_load + weight > self._max_capacity:
+                continue
+            before_pickup = distance_from_origin(self._stop_station(i))
+            if i < no_of_stop:
+                after_pickup = distance_from_origin(self._stop_station(i + 1))
+                pickup_detour = before_pickup + after_pickup - self._leg_costs[i]
+            else:
+                pickup_detour = before_pickup
+
+            for j in range(i, no_of_stop + 1):
+                max_load = max(max_load, self._load_after(j))
+                if max_load + weight > self._max_capacity:
+                    break
+                if i == j:
+                    added_cost = before_pickup + origin_to_destination
+                    if i < no_of_stop:
+                        added_cost += distance_from_destination(self._stop_station(i + 1)) - \
+                            self._leg_costs[i]
+                else:
+                    added_cost = pickup_detour + \
+                        distance_from_destination(self._stop_station(j))
+                    if j < no_of_stop:
+                        added_cost += distance_from_destination(self._stop_station(j + 1)) - \
+                            self._leg_costs[j]
+                if best is None or added_cost < best[0]:
+                    best = (added_cost, i, j)
+        return best
+
+    def insert(
+        self,
+        pickup_position,
+        drop_position,
+        package_index,
+        origin,
+        destination,
+        weight,
+        distance
+    ):
+        self._stops.insert(drop_position, (destination, package_index, -weight))
+        self._stops.insert(pickup_position, (origin, package_index, weight))
+        self._leg_costs = list()
+        self._loads = list()
+        station = self._station
+        load = 0
+        for stop_station, _package_index, stop_weight in self._stops:
+            self._leg_costs.append(distance(station, stop_station))
+            load += stop_weight
+            self._loads.append(load)
+            station = stop_station
+
+
+def find_cheapest_insertion(tours, candidates, package, distance_from_origin, distance_from_destination):
+    best = None
+    best_completion = math.inf
+    for tour_index in candidates:
+        tour = tours[tour_index]
+        insertion = tour.best_insertion(
+            package.origin(),
+            package.destination(),
+            package.weight(),
+            distance_from_origin,
+            distance_from_destination
+        )
+        if insertion is None:
+            continue
+        # among the trains, the one finishing its tour earliest takes the package so
+        # that work keeps being spread over the fleet
+        completion = tour.duration() + insertion[0]
+        if completion < best_completion or \
+                (completion == best_completion and insertion[0] < best[1][0]):
+            best = (tour_index, insertion)
+            best_completion = completion
+    return best
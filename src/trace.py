@@ -0,0 +1,180 @@
+import json
+import struct
+from collections import deque
+
+# the kinds of decision recorded
+CANDIDATE = 0
+ASSIGN = 1
+HITCHHIKE = 2
+SKIP = 3
+RELAY = 4
+KINDS = ('candidate', 'assign', 'hitchhike', 'skip', 'relay')
+
+# why a candidate train or a waiting package was turned down
+REASONS = (None, 'capacity', 'unreachable', 'drop_time', 'not_on_path')
+
+DEFAULT_TRACE_CAPACITY = 1 << 16
+NO_VALUE = -1
+
+# a trace file is a sequence of records, a name record maps an id to a package,
+# train or station name the first time the name is seen, a decision record refers
+# to names by id
+TRACE_FILE_MAGIC = b'MTRT'
+NAME_RECORD = 255
+NAME_HEADER = struct.Struct('<BIH')
+DECISION = struct.Struct('<BiiiqqB')
+
+
+class DecisionTrace:
+
+    # the latest decisions are kept in a ring buffer of plain tuples so that
+    # recording costs an append, with a path every decision is also written to a
+    # binary trace file
+    def __init__(self, capacity=DEFAULT_TRACE_CAPACITY, path=None):
+        self._decisions = deque(maxlen=capacity)
+        self._file = None
+        self._names = dict()
+        if path is not None:
+            self._file = open(path, 'wb')
+            self._file.write(TRACE_FILE_MAGIC)
+
+    def record(self, kind, package, train, station=None, cost=None, elapsed=None, reason=None):
+        decision = (kind, package, train, station, cost, elapsed, reason)
+        self._decisions.append(decision)
+        if self._file is not None:
+            self._write(decision)
+
+    def decisions(self):
+        return [decode_decision(decision) for decision in self._decisions]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _name_id(self, name):
+        if name is None:
+            return NO_VALUE
+        name_id = self._names.get(name, None)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names[name] = name_id
+            encoded_name = name.encode('utf-8')
+            self._file.write(NAME_HEADER.pack(NAME_RECORD, name_id, len(encoded_name)))
+            self._file.write(encoded_name)
+        return name_id
+
+    def _write(self, decision):
+        kind, package, train, station, cost, elapsed, reason = decision
+        self._file.write(DECISION.pack(
+            kind,
+            self._name_id(package),
+            self._name_id(train),
+            self._name_id(station),
+            NO_VALUE if cost is None else cost,
+            NO_VALUE if elapsed is None else elapsed,
+            REASONS.index(reason)
+        ))
+
+
+def decode_decision(decision):
+    kind, package, train, station, cost, elapsed, reason = decision
+    return {
+        'decision': KINDS[kind],
+        'package': package,
+        'train': train,
+        'station': station,
+        'cost': cost,
+        'elapsed_time': elapsed,
+        'reason': reason
+    }
+
+
+def read_trace_file(path):
+    with open(path, 'rb') as trace_file:
+        data = trace_file.read()
+    if data[:len(TRACE_FILE_MAGIC)] != TRACE_FILE_MAGIC:
+        raise ValueError('INVALID_TRACE_FILE')
+
+    names = dict()
+    decisions = list()
+    offset = len(TRACE_FILE_MAGIC)
+    while offset < len(data):
+        # a process killed while tracing leaves a truncated last record
+        try:
+            if data[offset] == NAME_RECORD:
+                _kind, name_id, length = NAME_HEADER.unpack_from(data, offset)
+                offset += NAME_HEADER.size
+                if offset + length > len(data):
+                    raise ValueError('INVALID_TRACE_FILE')
+                names[name_id] = data[offset:offset + length].decode('utf-8')
+                offset += length
+                continue
+            kind, package, train, station, cost, elapsed, reason = \
+                DECISION.unpack_from(data, offset)
+        except (struct.error, UnicodeDecodeError) as _e:
+            raise ValueError('INVALID_TRACE_FILE')
+        if kind >= len(KINDS) or reason >= len(REASONS):
+            raise ValueError('INVALID_TRACE_FILE')
+        offset += DECISION.size
+        decisions.append(decode_decision((
+            kind,
+            names.get(package, None),
+            names.get(train, None),
+            names.get(station, None),
+            None if cost == NO_VALUE else cost,
+            None if elapsed == NO_VALUE else elapsed,
+            REASONS[reason]
+        )))
+    return decisions
+
+
+# the schedule as a chrome trace / perfetto timeline, one thread per train with a
+# slice per route travelled, decisions taken for a train are instant events at
+# the train elapsed time when they were made
+def export_chrome_trace(path, logs, decisions=None, time_unit=1000):
+    train_ids = dict()
+    events = list()
+    for log in logs:
+        train_id = train_ids.setdefault(log['train'], len(train_ids) + 1)
+        if log['next_station'] is None:
+            continue
+        events.append({
+            'name': log['next_route'],
+            'cat': 'route',
+            'ph': 'X',
+            'pid': 1,
+            'tid': train_id,
+            'ts': log['time'] * time_unit,
+            'dur': log['next_journey_duration'] * time_unit,
+            'args': {
+                'from': log['station'],
+                'to': log['next_station'],
+                'loaded_packages': log['loaded_packages'],
+                'dropped_packages': log['dropped_packages']
+            }
+        })
+    for decision in decisions or list():
+        if decision['decision'] not in ('assign', 'hitchhike', 'relay'):
+            continue
+        train_id = train_ids.setdefault(decision['train'], len(train_ids) + 1)
+        events.append({
+            'name': '{} {}'.format(decision['decision'], decision['package']),
+            'cat': 'decision',
+            'ph': 'i',
+            's': 't',
+            'pid': 1,
+            'tid': train_id,
+            'ts': (decision['elapsed_time'] or 0) * time_unit,
+            'args': decision
+        })
+    for train, train_id in train_ids.items():
+        events.append({
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': 1,
+            'tid': train_id,
+            'args': {'name': train}
+        })
+    with open(path, 'w') as trace_file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
@@ -11,12 +11,18 @@ class Train:
         self._elapsed_time = 0
         self._log = list()
 
+    def name(self):
+        return self._name
+
     def locate(self):
         return self._station
 
     def max_capacity(self):
         return self._max_capacity
 
+    def capacity(self):
+        return self._capacity
+
     def elapsed_time(self):
         return self._elapsed_time
 
@@ -70,5 +76,10 @@ class Train:
             'next_journey_duration': journey_duration
         })
 
+    # add packages relayed through an already recorded stop
+    def amend_log(self, log_index, loaded_packages, dropped_packages):
+        self._log[log_index]['loaded_packages'].extend(loaded_packages)
+        self._log[log_index]['dropped_packages'].extend(dropped_packages)
+
     def retrieve_log(self):
         return self._log